@@ -2,17 +2,18 @@
 Main Streamlit dashboard to choose between Student and Admin experiences.
 """
 
-from pathlib import Path
+import os
 import sys
 
 import streamlit as st
 
 from config import Config
 
-# Ensure project root is on sys.path (for any future imports)
-BASE_DIR = Path(__file__).resolve().parent
-if str(BASE_DIR) not in sys.path:
-    sys.path.insert(0, str(BASE_DIR))
+# Ensure project root is on sys.path (for any future imports), once per process
+if "src" not in sys.modules:
+    BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
 
 st.set_page_config(
     page_title="Spotlight Academy - AI Assistant",
@@ -3,23 +3,40 @@ FastAPI app exposing the RAG chat endpoint for Spotlight Academy (Sprint 2).
 
 This complements the Streamlit ingestion admin panel by providing:
 - /api/chat endpoint for student-facing chat
+- /api/chat/stream endpoint that streams the answer as Server-Sent Events
 - Basic guardrails to prevent full assignment/project solutions
-"""
 
-from typing import List, Optional, Dict
+Run with one worker per CPU core, e.g.:
+    uvicorn chat_api:app --workers 4
+"""
 
-from fastapi import FastAPI
+import asyncio
+import logging
+import threading
+from contextlib import asynccontextmanager
+from functools import lru_cache
+from typing import Any, AsyncIterator, List, Optional, Dict, Tuple
+
+import numpy as np
+import orjson
+from cachetools import TTLCache
+from fastapi import Depends, FastAPI
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 import google.generativeai as genai
 
 from config import Config
-from src.rag.rag_service import RAGService
+from src.rag.rag_service import RAGService, is_trivial_query
+from src.rag.session_store import ChatSession, SessionStore
 from src.guardrails.intent_classifier import (
     classify_intent,
     build_solution_guardrail_instructions,
     build_solution_seeking_response,
 )
 
+logger = logging.getLogger(__name__)
+
 
 class ChatRequest(BaseModel):
     message: str
@@ -45,37 +62,91 @@ class ChatResponse(BaseModel):
     sources: List[SourceChunk]
 
 
-app = FastAPI(title="Spotlight Academy RAG API", version="0.1.0")
-
-
-@app.on_event("startup")
-def _configure_genai():
+@lru_cache(maxsize=1)
+def configure_genai() -> None:
+    """Validate config and configure the Gemini SDK once per process."""
     Config.validate()
     genai.configure(api_key=Config.GOOGLE_API_KEY)
 
 
-rag_service = RAGService()
+@lru_cache(maxsize=1)
+def get_rag_service() -> RAGService:
+    """Lazily build a single RAGService shared by all requests in this process."""
+    return RAGService()
 
 
-@app.post("/api/chat", response_model=ChatResponse)
-def chat_endpoint(payload: ChatRequest):
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pre-warm SDK config and the RAG clients so the first request doesn't pay for them
+    configure_genai()
+    await asyncio.to_thread(get_rag_service)
+    yield
+
+
+# JSON routes declare a response_model, so FastAPI serializes them straight to
+# bytes with Pydantic's Rust serializer; no custom response class is needed
+app = FastAPI(
+    title="Spotlight Academy RAG API",
+    version="0.1.0",
+    lifespan=lifespan,
+)
+
+# Routes whose bodies must reach the client unbuffered
+_UNCOMPRESSED_PATHS = frozenset({"/api/chat/stream"})
+
+
+class _GZipExceptStreams:
     """
-    Main RAG chat endpoint used by the student-facing UI.
+    GZipMiddleware for every route except the SSE stream.
 
-    - Classifies intent (concept_question, hint_request, solution_seeking)
-    - Applies guardrails for solution-seeking queries
-    - Retrieves relevant course content and calls Gemini for an answer
-    - Returns answer plus structured citations
+    Some Starlette releases gzip text/event-stream and buffer it until the
+    compressor flushes, which would hold back the answer deltas.
     """
-    # 1) Classify intent & apply guardrails
-    intent = classify_intent(payload.message)
 
-    if intent == "solution_seeking":
-        # Hard guardrail: do not call LLM, just return guided response
-        guided_answer = build_solution_seeking_response()
-        return ChatResponse(answer=guided_answer, intent=intent, sources=[])
+    def __init__(self, app, minimum_size: int = 1024):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
 
-    # 2) Retrieve context from RAG service
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"] in _UNCOMPRESSED_PATHS:
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
+
+
+app.add_middleware(_GZipExceptStreams, minimum_size=1024)
+
+# The UI only shows source labels, so citations carry a short content preview
+SOURCE_PREVIEW_CHARS = 300
+
+
+# Intent depends only on the message text, so repeated questions skip the regex pass
+_classify_intent = lru_cache(maxsize=4096)(classify_intent)
+
+# Retrieval results keyed on (message, filters); only non-empty results are cached
+_retrieval_cache: TTLCache = TTLCache(
+    maxsize=Config.RETRIEVAL_CACHE_SIZE, ttl=Config.RETRIEVAL_CACHE_TTL
+)
+_retrieval_cache_lock = threading.Lock()
+
+
+def _retrieve_context_cached(
+    rag_service: RAGService, message: str, filter_items: Tuple
+) -> List[Dict]:
+    key = (message, filter_items)
+    with _retrieval_cache_lock:
+        retrieved = _retrieval_cache.get(key)
+    if retrieved is not None:
+        return retrieved
+
+    retrieved = rag_service.retrieve_context(message, dict(filter_items) or None)
+    if retrieved:
+        with _retrieval_cache_lock:
+            _retrieval_cache[key] = retrieved
+    return retrieved
+
+
+def _build_filters(payload: ChatRequest) -> Optional[Dict]:
     filters: Dict = {}
     if payload.module:
         filters["module"] = payload.module
@@ -83,70 +154,311 @@ def chat_endpoint(payload: ChatRequest):
         filters["chapter"] = payload.chapter
     if payload.lesson:
         filters["lesson"] = payload.lesson
+    return filters or None
 
-    retrieved = rag_service.retrieve_context(payload.message, filters or None)
-    context_text, _ = rag_service.build_context_prompt(retrieved)
-
-    # 3) Build system/user prompts for Gemini
-    guardrail_instructions = build_solution_guardrail_instructions()
-
-    # Adjust style based on quick action mode
-    mode_instruction = ""
-    if payload.mode == "explain":
-        mode_instruction = "Focus on giving a clear, step-by-step explanation of the underlying concepts.\n"
-    elif payload.mode == "hint":
-        mode_instruction = (
-            "Do NOT provide the full solution. Instead, give 1–3 progressively stronger hints "
-            "that help the student move forward.\n"
-        )
-    elif payload.mode == "source":
-        mode_instruction = (
-            "Focus on summarizing what the retrieved sources say that is relevant to the question. "
-            "Do not invent content beyond the provided context.\n"
-        )
 
-    system_prompt = (
-        f"{guardrail_instructions}\n\n"
-        "You MUST answer using ONLY the course content provided in the CONTEXT.\n"
-        "If the context is not sufficient, say you don't have enough information from Spotlight Academy materials.\n"
-        "Cite specific sources at the end of your answer under a 'Sources' section.\n"
-    )
+# Prompts never change between requests, so build them once at import
+_SYSTEM_PROMPT = (
+    f"{build_solution_guardrail_instructions()}\n\n"
+    "You MUST answer using ONLY the course content provided in the CONTEXT.\n"
+    "If the context is not sufficient, say you don't have enough information from Spotlight Academy materials.\n"
+    "Cite specific sources at the end of your answer under a 'Sources' section.\n"
+)
 
+# Style adjustments for the quick action modes
+_MODE_INSTRUCTIONS = {
+    "explain": "Focus on giving a clear, step-by-step explanation of the underlying concepts.\n",
+    "hint": (
+        "Do NOT provide the full solution. Instead, give 1–3 progressively stronger hints "
+        "that help the student move forward.\n"
+    ),
+    "source": (
+        "Focus on summarizing what the retrieved sources say that is relevant to the question. "
+        "Do not invent content beyond the provided context.\n"
+    ),
+}
+
+
+def _build_prompts(payload: ChatRequest, context_text: str) -> Tuple[str, str]:
+    """Build the system and user prompts for Gemini."""
     user_prompt = (
         f"CONTEXT:\n{context_text or '[No context retrieved]'}\n\n"
-        f"{mode_instruction}"
+        f"{_MODE_INSTRUCTIONS.get(payload.mode, '')}"
         f"STUDENT QUESTION:\n{payload.message}"
     )
+    return _SYSTEM_PROMPT, user_prompt
 
-    model_name = getattr(Config, "GENERATION_MODEL", "gemini-1.5-flash")
-    model = genai.GenerativeModel(model_name)
-    result = model.generate_content(
-        [
-            {"role": "system", "parts": [system_prompt]},
-            {"role": "user", "parts": [user_prompt]},
-        ]
-    )
-
-    answer_text = result.text or ""
 
-    # 4) Build structured sources list for UI citations
+def _build_sources(retrieved: List[Dict]) -> List[SourceChunk]:
+    """Build structured sources list for UI citations."""
     sources: List[SourceChunk] = []
     for item in retrieved:
         metadata = item.get("metadata", {}) or {}
+        content = item.get("content") or item.get("chunk") or ""
+        # Rows come from our own Supabase tables, so skip field validation
         sources.append(
-            SourceChunk(
-                content=item.get("content") or item.get("chunk") or "",
+            SourceChunk.model_construct(
+                content=content[:SOURCE_PREVIEW_CHARS],
                 source_file=metadata.get("source_file") or item.get("source_file"),
                 module=metadata.get("module") or item.get("module"),
                 chapter=metadata.get("chapter") or item.get("chapter"),
                 lesson=metadata.get("lesson") or item.get("lesson"),
             )
         )
+    return sources
+
+
+# Canned replies for greetings and acknowledgements, which need no retrieval or model call
+_GREETINGS = frozenset({"hi", "hello", "hey"})
+_GREETING_REPLY = "Hi! What would you like to learn about from your Spotlight Academy course materials?"
+_ACKNOWLEDGEMENT_REPLY = "Glad to help! Ask me another question about your course materials whenever you're ready."
+
+
+def _trivial_reply(message: str) -> Optional[str]:
+    """Canned reply for a trivial message, or None if the message needs a real answer."""
+    if not (Config.SKIP_TRIVIAL_QUERIES and is_trivial_query(message)):
+        return None
+    if message.strip().lower().strip("!?.") in _GREETINGS:
+        return _GREETING_REPLY
+    return _ACKNOWLEDGEMENT_REPLY
+
+
+def _build_follow_up_prompt(payload: ChatRequest) -> str:
+    """Prompt for a follow-up turn that continues an existing Gemini chat."""
+    return (
+        "Answer using the same CONTEXT as earlier in this conversation.\n"
+        f"{_MODE_INSTRUCTIONS.get(payload.mode, '')}"
+        f"STUDENT FOLLOW-UP QUESTION:\n{payload.message}"
+    )
+
+
+def _get_generation_model():
+    model_name = getattr(Config, "GENERATION_MODEL", "gemini-1.5-flash")
+    return genai.GenerativeModel(model_name)
+
 
+def _filter_items(payload: ChatRequest) -> Tuple:
+    return tuple(sorted((_build_filters(payload) or {}).items()))
+
+
+async def _retrieve(
+    rag_service: RAGService, payload: ChatRequest
+) -> Tuple[List[Dict], str]:
+    """Retrieve context chunks and the formatted context text for a request."""
+    # Blocking Supabase/embedding calls run off the event loop
+    retrieved = await asyncio.to_thread(
+        _retrieve_context_cached, rag_service, payload.message, _filter_items(payload)
+    )
+    context_text, _ = RAGService.build_context_prompt(retrieved)
+    return retrieved, context_text
+
+
+# Per-student conversation state for cheap follow-up turns
+_sessions = SessionStore(
+    max_sessions=Config.CHAT_SESSION_MAX, ttl_seconds=Config.CHAT_SESSION_TTL
+)
+
+
+async def _embed_message(rag_service: RAGService, message: str) -> Optional[np.ndarray]:
+    """Query embedding used to match follow-ups to a session; None if embedding fails."""
+    try:
+        return await asyncio.to_thread(rag_service.embed_query, message)
+    except Exception as e:
+        logger.warning(f"Could not embed message for follow-up matching: {e}")
+        return None
+
+
+def _is_follow_up(session: ChatSession, query_embedding: Optional[np.ndarray]) -> bool:
+    # Embeddings are unit length, so the dot product is the cosine similarity
+    return (
+        query_embedding is not None
+        and session.query_embedding is not None
+        and float(np.dot(session.query_embedding, query_embedding)) >= Config.FOLLOW_UP_SIMILARITY
+    )
+
+
+async def _prepare_turn(
+    rag_service: RAGService, payload: ChatRequest
+) -> Tuple[List[Dict], Optional[ChatSession], Any, Optional[np.ndarray]]:
+    """
+    Decide how to answer a (non-guardrailed) turn.
+
+    Returns ``(retrieved, session, content, query_embedding)``. When a student
+    with a live session asks something close enough to the question that
+    session was built for, ``session`` is taken out of the store for this
+    turn and its previous retrieval is reused; otherwise ``session`` is None
+    and ``content`` is a fresh RAG prompt. ``query_embedding`` is computed once
+    per request (students only) and passed on to _remember_turn.
+    """
+    if not payload.student_id:
+        retrieved, content = await _fresh_turn(rag_service, payload)
+        return retrieved, None, content, None
+
+    # Cached by RAGService, so a fresh retrieval below reuses this embedding
+    query_embedding = await _embed_message(rag_service, payload.message)
+    session = await _sessions.get(payload.student_id)
+    if (
+        session is not None
+        and session.filter_items == _filter_items(payload)
+        and _is_follow_up(session, query_embedding)
+        # A concurrent request from the same student may be using the chat
+        and await _sessions.take(payload.student_id, session)
+    ):
+        return session.retrieved, session, _build_follow_up_prompt(payload), query_embedding
+
+    retrieved, content = await _fresh_turn(rag_service, payload)
+    return retrieved, None, content, query_embedding
+
+
+async def _fresh_turn(rag_service: RAGService, payload: ChatRequest) -> Tuple[List[Dict], List[Dict]]:
+    """Retrieve context and build the prompt for a turn that starts a new conversation."""
+    retrieved, context_text = await _retrieve(rag_service, payload)
+    system_prompt, user_prompt = _build_prompts(payload, context_text)
+    content = [
+        {"role": "system", "parts": [system_prompt]},
+        {"role": "user", "parts": [user_prompt]},
+    ]
+    return retrieved, content
+
+
+async def _generate(session: Optional[ChatSession], content: Any, stream: bool = False):
+    if session is not None:
+        return await session.chat.send_message_async(content, stream=stream)
+    return await _get_generation_model().generate_content_async(content, stream=stream)
+
+
+async def _remember_turn(
+    payload: ChatRequest,
+    session: Optional[ChatSession],
+    retrieved: List[Dict],
+    content: Any,
+    answer_text: str,
+    query_embedding: Optional[np.ndarray],
+) -> None:
+    """
+    Store the student's session after a successful turn.
+
+    A continued session goes back into the store; a fresh turn starts a new
+    one so the student's follow-ups can continue it. Sessions of failed or
+    disconnected turns are never put back, since their chat is left mid-turn.
+    """
+    if not payload.student_id:
+        return
+    if session is None:
+        if query_embedding is None:
+            return
+        history = [
+            {"role": "user", "parts": [part for item in content for part in item["parts"]]},
+            {"role": "model", "parts": [answer_text]},
+        ]
+        chat = _get_generation_model().start_chat(history=history)
+        session = ChatSession(retrieved, _filter_items(payload), chat, query_embedding)
+    await _sessions.put(payload.student_id, session)
+
+
+def _sse(event: Dict) -> str:
+    return f"data: {orjson.dumps(event).decode()}\n\n"
+
+
+def _chunk_text(chunk) -> str:
+    # .text raises when a streamed chunk carries no text parts (e.g. safety stop)
+    try:
+        return chunk.text or ""
+    except ValueError:
+        return ""
+
+
+def _canned_stream(intent: str, answer: str) -> StreamingResponse:
+    """Stream a fixed answer with the same meta/delta/done events as a generated one."""
+    async def events() -> AsyncIterator[str]:
+        yield _sse({"type": "meta", "intent": intent, "sources": []})
+        yield _sse({"type": "delta", "text": answer})
+        yield _sse({"type": "done"})
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/api/chat", response_model=ChatResponse)
+async def chat_endpoint(
+    payload: ChatRequest, rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Main RAG chat endpoint used by the student-facing UI.
+
+    - Classifies intent (concept_question, hint_request, solution_seeking)
+    - Applies guardrails for solution-seeking queries
+    - Retrieves relevant course content and calls Gemini for an answer
+    - Returns answer plus structured citations
+    """
+    # 1) Classify intent & apply guardrails
+    intent = _classify_intent(payload.message)
+
+    if intent == "solution_seeking":
+        # Hard guardrail: do not call LLM, just return guided response
+        guided_answer = build_solution_seeking_response()
+        return ChatResponse(answer=guided_answer, intent=intent, sources=[])
+
+    # Greetings and thanks get a canned reply and leave the student's session as it is
+    canned_answer = _trivial_reply(payload.message)
+    if canned_answer is not None:
+        return ChatResponse(answer=canned_answer, intent=intent, sources=[])
+
+    # 2) Retrieve context (or reuse the session's) and build prompts for Gemini
+    retrieved, session, content, query_embedding = await _prepare_turn(rag_service, payload)
+
+    # 3) Generate the answer
+    result = await _generate(session, content)
+    answer_text = result.text or ""
+    await _remember_turn(payload, session, retrieved, content, answer_text, query_embedding)
+
+    # 4) Build structured sources list for UI citations
     return ChatResponse(
         answer=answer_text,
         intent=intent,
-        sources=sources,
+        sources=_build_sources(retrieved),
     )
 
 
+@app.post("/api/chat/stream")
+async def chat_stream_endpoint(
+    payload: ChatRequest, rag_service: RAGService = Depends(get_rag_service)
+):
+    """
+    Streaming variant of /api/chat using Server-Sent Events.
+
+    Emits a single ``meta`` event (intent + sources), then ``delta`` events
+    carrying answer text as Gemini produces it, and finally a ``done`` event.
+    Generation failures are reported as an ``error`` event.
+    """
+    intent = _classify_intent(payload.message)
+
+    if intent == "solution_seeking":
+        return _canned_stream(intent, build_solution_seeking_response())
+
+    canned_answer = _trivial_reply(payload.message)
+    if canned_answer is not None:
+        return _canned_stream(intent, canned_answer)
+
+    retrieved, session, content, query_embedding = await _prepare_turn(rag_service, payload)
+    sources = [source.model_dump() for source in _build_sources(retrieved)]
+
+    async def answer_stream() -> AsyncIterator[str]:
+        yield _sse({"type": "meta", "intent": intent, "sources": sources})
+        try:
+            response = await _generate(session, content, stream=True)
+            answer_parts = []
+            async for chunk in response:
+                text = _chunk_text(chunk)
+                if text:
+                    answer_parts.append(text)
+                    yield _sse({"type": "delta", "text": text})
+            # Only reached when the stream completed; a disconnect skips it
+            await _remember_turn(
+                payload, session, retrieved, content, "".join(answer_parts), query_embedding
+            )
+        except Exception as e:
+            logger.error(f"Error streaming Gemini response: {e}")
+            yield _sse({"type": "error", "message": "Failed to generate an answer."})
+        yield _sse({"type": "done"})
+
+    return StreamingResponse(answer_stream(), media_type="text/event-stream")
@@ -13,6 +13,8 @@ class Config:
     SUPABASE_URL = os.getenv("SUPABASE_URL")
     SUPABASE_KEY = os.getenv("SUPABASE_KEY")
     SUPABASE_SERVICE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+    # Optional direct Postgres URL; enables COPY-based bulk loading during ingestion
+    DIRECT_PG_URL = os.getenv("DIRECT_PG_URL")
     
     # Google Gemini
     GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
@@ -24,18 +26,41 @@ class Config:
     # RAG Configuration
     CHUNK_SIZE = 500  # tokens
     CHUNK_OVERLAP = 50  # tokens
+    MIN_CHUNK_TOKENS = 20  # shorter chunks are dropped before embedding
+    MIN_CHUNK_ALNUM_RATIO = 0.4  # share of letters/digits among non-space chars
     MAX_CHUNKS_PER_QUERY = 8
     EMBEDDING_MODEL = "models/embedding-001"  # Google embedding model
     EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "google")  # google | local
     LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
     LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "384"))
+    EMBEDDING_BATCH_SIZE = 100  # texts per embedding API call (Google max is 100)
+    EMBED_CONCURRENCY = int(os.getenv("EMBED_CONCURRENCY", "8"))  # embedding batches in flight at once
+    STREAM_CHUNK_BATCH_SIZE = 64  # chunks parsed ahead of embedding in ingest_file
+    CHUNK_EMBEDDING_CACHE_SIZE = 1024  # recent chunk embeddings kept in memory per IngestionPipeline
+    QUERY_EMBEDDING_CACHE_SIZE = 512  # query embeddings kept per RAGService
+    SEMANTIC_CACHE_SIZE = 1000  # past query embeddings compared against new queries
+    SEMANTIC_CACHE_THRESHOLD = 0.95  # cosine similarity needed to reuse a past retrieval
+    RETRIEVAL_CACHE_SIZE = 1024  # cached (query, filters) retrievals
+    RETRIEVAL_CACHE_TTL = 900  # seconds
+    SKIP_TRIVIAL_QUERIES = os.getenv("SKIP_TRIVIAL_QUERIES", "true").lower() == "true"  # canned reply, no retrieval, for "hi", "thanks"
+    CHAT_SESSION_MAX = 1000  # concurrent student sessions kept per API worker
+    CHAT_SESSION_TTL = 1800  # seconds of inactivity before a session is dropped
+    FOLLOW_UP_SIMILARITY = 0.8  # query similarity needed to reuse the session's retrieval
     
     # Content Processing
     SUPPORTED_FORMATS = [".pdf", ".docx", ".pptx", ".png", ".jpg", ".jpeg"]
     MAX_FILE_SIZE_MB = 50
+    PDF_PARALLEL_MIN_PAGES = 100  # pages per extra process when splitting one large PDF
+    INMEMORY_THRESHOLD_MB = 8  # smaller uploads are parsed from memory without a temp file
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", os.cpu_count() or 1))  # parse/OCR processes
+    INGEST_STORE_WORKERS = int(os.getenv("INGEST_STORE_WORKERS", "8"))  # files embedded/stored concurrently
     
     # Vector DB Configuration
     VECTOR_DIMENSION = 768  # Google embedding-001 dimension (verify with actual model)
+    HNSW_M = int(os.getenv("HNSW_M", "16"))  # graph connectivity of the HNSW vector index
+    HNSW_EF_CONSTRUCTION = int(os.getenv("HNSW_EF_CONSTRUCTION", "64"))  # build-time candidate list size
+    BULK_LOAD_MIN_FILES = int(os.getenv("BULK_LOAD_MIN_FILES", "50"))  # rebuild the index after larger ingests
+    SUPABASE_INSERT_BATCH_SIZE = int(os.getenv("SUPABASE_INSERT_BATCH_SIZE", "500"))  # rows per bulk insert
     
     @classmethod
     def validate(cls):
@@ -0,0 +1,8 @@
+-- Track a content hash of the source file each chunk came from
+-- Lets the ingestion pipeline skip re-uploads of a file already ingested at the same version
+-- Run this in your Supabase SQL editor after 001_create_course_content_table.sql
+
+ALTER TABLE course_content ADD COLUMN IF NOT EXISTS file_hash TEXT;
+
+CREATE INDEX IF NOT EXISTS course_content_file_hash_version_idx
+ON course_content(file_hash, version);
@@ -0,0 +1,65 @@
+-- Switch vector similarity search from cosine distance to inner product
+-- The application L2-normalizes every embedding, so inner product equals cosine similarity
+-- and pgvector can skip the per-row norm computation.
+-- Run this in your Supabase SQL editor after 002_add_file_hash.sql
+
+-- Normalize rows stored before embeddings were normalized (requires pgvector >= 0.7.0)
+UPDATE course_content
+SET embedding = l2_normalize(embedding)
+WHERE embedding IS NOT NULL;
+
+-- Rebuild the vector index with inner product operators
+DROP INDEX IF EXISTS course_content_embedding_idx;
+
+CREATE INDEX IF NOT EXISTS course_content_embedding_idx
+ON course_content
+USING ivfflat (embedding vector_ip_ops)
+WITH (lists = 100);
+
+-- <#> returns the negative inner product, so similarity = -(a <#> b)
+CREATE OR REPLACE FUNCTION match_course_content(
+    query_embedding vector(768),
+    match_threshold float DEFAULT 0.7,
+    match_count int DEFAULT 8,
+    filter_module text DEFAULT NULL,
+    filter_chapter text DEFAULT NULL,
+    filter_lesson text DEFAULT NULL
+)
+RETURNS TABLE (
+    id uuid,
+    content text,
+    metadata jsonb,
+    module text,
+    chapter text,
+    lesson text,
+    concept text,
+    source_file text,
+    version integer,
+    similarity float
+)
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    RETURN QUERY
+    SELECT
+        course_content.id,
+        course_content.content,
+        course_content.metadata,
+        course_content.module,
+        course_content.chapter,
+        course_content.lesson,
+        course_content.concept,
+        course_content.source_file,
+        course_content.version,
+        -(course_content.embedding <#> query_embedding) as similarity
+    FROM course_content
+    WHERE 
+        course_content.embedding IS NOT NULL
+        AND (filter_module IS NULL OR course_content.module = filter_module)
+        AND (filter_chapter IS NULL OR course_content.chapter = filter_chapter)
+        AND (filter_lesson IS NULL OR course_content.lesson = filter_lesson)
+        AND -(course_content.embedding <#> query_embedding) >= match_threshold
+    ORDER BY course_content.embedding <#> query_embedding
+    LIMIT match_count;
+END;
+$$;
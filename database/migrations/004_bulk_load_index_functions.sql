@@ -0,0 +1,51 @@
+-- Replace the IVFFlat vector index with HNSW and add functions to drop/rebuild it
+-- Loading rows into a table without a vector index and building the index afterwards
+-- is much faster than maintaining the index on every insert. The ingestion pipeline
+-- calls these around large directory ingests (see Config.BULK_LOAD_MIN_FILES).
+-- Vector search falls back to a sequential scan while the index is dropped.
+-- Run this in your Supabase SQL editor after 003_inner_product_search.sql
+
+DROP INDEX IF EXISTS course_content_embedding_idx;
+
+CREATE INDEX IF NOT EXISTS course_content_embedding_idx
+ON course_content
+USING hnsw (embedding vector_ip_ops)
+WITH (m = 16, ef_construction = 64);
+
+CREATE OR REPLACE FUNCTION drop_course_content_embedding_index()
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    DROP INDEX IF EXISTS course_content_embedding_idx;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION create_course_content_hnsw_index(
+    m int DEFAULT 16,
+    ef_construction int DEFAULT 64
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+    -- Index builds are far faster when the graph fits in maintenance_work_mem
+    SET LOCAL maintenance_work_mem = '512MB';
+    EXECUTE format(
+        'CREATE INDEX IF NOT EXISTS course_content_embedding_idx '
+        'ON course_content USING hnsw (embedding vector_ip_ops) '
+        'WITH (m = %s, ef_construction = %s)',
+        m, ef_construction
+    );
+END;
+$$;
+
+-- Only the service role (used for ingestion) may drop or rebuild the index
+REVOKE EXECUTE ON FUNCTION drop_course_content_embedding_index() FROM PUBLIC, anon, authenticated;
+REVOKE EXECUTE ON FUNCTION create_course_content_hnsw_index(int, int) FROM PUBLIC, anon, authenticated;
+GRANT EXECUTE ON FUNCTION drop_course_content_embedding_index() TO service_role;
+GRANT EXECUTE ON FUNCTION create_course_content_hnsw_index(int, int) TO service_role;
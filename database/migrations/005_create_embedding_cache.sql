@@ -0,0 +1,12 @@
+-- Cache of chunk embeddings keyed by the SHA-256 of the chunk text and the embedding model
+-- Re-ingesting a changed document (version > 1) deletes its course_content rows, but
+-- unchanged chunks can still reuse their embedding from here instead of calling the API.
+-- Run this in your Supabase SQL editor after 004_bulk_load_index_functions.sql
+
+CREATE TABLE IF NOT EXISTS embedding_cache (
+    hash TEXT NOT NULL,
+    model TEXT NOT NULL,
+    embedding vector(768) NOT NULL,
+    created_at TIMESTAMP DEFAULT NOW(),
+    PRIMARY KEY (hash, model)
+);
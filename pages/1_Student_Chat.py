@@ -4,8 +4,10 @@ Streamlit student-facing chat interface (Sprint 2).
 This UI calls the FastAPI RAG endpoint defined in chat_api.py.
 """
 
+import json
 import logging
-from typing import Dict
+import uuid
+from typing import Dict, Iterator
 
 import requests
 import streamlit as st
@@ -26,46 +28,101 @@ st.markdown(
 )
 
 
-def send_chat_request(message: str, mode: str | None = None) -> Dict:
+@st.cache_resource
+def get_http_session() -> requests.Session:
+    """Keep-alive session shared across reruns so each turn reuses the API connection."""
+    return requests.Session()
+
+
+def stream_chat_request(message: str, mode: str | None, meta: Dict) -> Iterator[str]:
+    """
+    Stream answer text from the SSE chat endpoint.
+
+    The ``meta`` event (intent and sources) is stored into ``meta`` so the
+    caller can render citations once the answer has finished streaming.
+    """
     payload = {
         "message": message,
+        "student_id": st.session_state.student_id,
         "mode": mode,
     }
-    try:
-        resp = requests.post(f"{API_BASE_URL}/api/chat", json=payload, timeout=30)
+    with get_http_session().post(
+        f"{API_BASE_URL}/api/chat/stream", json=payload, stream=True, timeout=30
+    ) as resp:
         resp.raise_for_status()
-        return resp.json()
-    except Exception as e:
-        logger.error(f"Chat API error: {e}")
-        st.error("There was a problem contacting the AI assistant. Please try again.")
-        return {}
+        resp.encoding = "utf-8"
+        for line in resp.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data: "):
+                continue
+            event = json.loads(line[len("data: "):])
+            event_type = event.get("type")
+            if event_type == "meta":
+                meta.update(event)
+            elif event_type == "delta":
+                yield event.get("text", "")
+            elif event_type == "error":
+                raise RuntimeError(event.get("message", "Chat API error"))
 
 
 if "messages" not in st.session_state:
     st.session_state.messages = []
 
-# Quick action buttons
-col1, col2, col3 = st.columns(3)
-with col1:
-    if st.button("🧠 Explain it"):
-        st.session_state.quick_mode = "explain"
-with col2:
-    if st.button("💡 Give me a hint"):
-        st.session_state.quick_mode = "hint"
-with col3:
-    if st.button("📚 Show the source"):
-        st.session_state.quick_mode = "source"
-
-quick_mode = st.session_state.get("quick_mode")
+# Identifies this browser session so the API can continue the conversation
+if "student_id" not in st.session_state:
+    st.session_state.student_id = str(uuid.uuid4())
+
+@st.fragment
+def render_quick_actions():
+    """Quick action buttons; clicking one reruns only this fragment."""
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        if st.button("🧠 Explain it"):
+            st.session_state.quick_mode = "explain"
+    with col2:
+        if st.button("💡 Give me a hint"):
+            st.session_state.quick_mode = "hint"
+    with col3:
+        if st.button("📚 Show the source"):
+            st.session_state.quick_mode = "source"
+
+
+@st.fragment
+def render_history():
+    for msg in st.session_state.messages:
+        with st.chat_message(msg["role"]):
+            st.markdown(msg["content"])
+
+
+@st.fragment
+def render_sources(sources):
+    st.markdown("---")
+    st.markdown("**Sources (Spotlight Academy course content):**")
+    for idx, src in enumerate(sources, start=1):
+        path_parts = [
+            p
+            for p in [
+                src.get("module"),
+                src.get("chapter"),
+                src.get("lesson"),
+            ]
+            if p
+        ]
+        label = src.get("source_file") or "Course material"
+        if path_parts:
+            label += f" — {' > '.join(path_parts)}"
+        st.markdown(f"- **Source {idx}**: {label}")
+
+
+render_quick_actions()
 
 # Render chat history
-for msg in st.session_state.messages:
-    with st.chat_message(msg["role"]):
-        st.markdown(msg["content"])
+render_history()
 
 prompt = st.chat_input("Type your question about the course...")
 
 if prompt:
+    quick_mode = st.session_state.get("quick_mode")
+
     # Add user message
     st.session_state.messages.append({"role": "user", "content": prompt})
     with st.chat_message("user"):
@@ -73,37 +130,21 @@ if prompt:
 
     # Call backend
     with st.chat_message("assistant"):
-        with st.spinner("Thinking..."):
-            result = send_chat_request(prompt, mode=quick_mode)
-
-        if not result:
+        meta: Dict = {}
+        try:
+            # Display answer tokens as they arrive
+            answer = st.write_stream(stream_chat_request(prompt, quick_mode, meta))
+        except Exception as e:
+            logger.error(f"Chat API error: {e}")
+            st.error("There was a problem contacting the AI assistant. Please try again.")
             st.stop()
 
-        answer = result.get("answer", "")
-        intent = result.get("intent", "")
-        sources = result.get("sources", [])
-
-        # Display answer
-        st.markdown(answer)
+        intent = meta.get("intent", "")
+        sources = meta.get("sources", [])
 
         # Display citations
         if sources:
-            st.markdown("---")
-            st.markdown("**Sources (Spotlight Academy course content):**")
-            for idx, src in enumerate(sources, start=1):
-                path_parts = [
-                    p
-                    for p in [
-                        src.get("module"),
-                        src.get("chapter"),
-                        src.get("lesson"),
-                    ]
-                    if p
-                ]
-                label = src.get("source_file") or "Course material"
-                if path_parts:
-                    label += f" — {' > '.join(path_parts)}"
-                st.markdown(f"- **Source {idx}**: {label}")
+            render_sources(sources)
 
         # Append assistant message to history
         st.session_state.messages.append(
@@ -2,21 +2,25 @@
 Streamlit admin panel for content ingestion (moved from root app.py).
 """
 
+import asyncio
 import logging
+import os
 from pathlib import Path
 import shutil
 import sys
 import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
 import streamlit as st
 
-# Ensure project root is on sys.path so we can import src.*
-BASE_DIR = Path(__file__).resolve().parent.parent
-if str(BASE_DIR) not in sys.path:
-    sys.path.insert(0, str(BASE_DIR))
+# Ensure project root is on sys.path so we can import src.* (once per process)
+if "src" not in sys.modules:
+    BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if BASE_DIR not in sys.path:
+        sys.path.insert(0, BASE_DIR)
 
-from src.ingestion.ingestion_pipeline import IngestionPipeline
+from src.ingestion.ingestion_pipeline import IngestionPipeline, SUPPORTED_EXTENSIONS
 from config import Config
 
 # Configure logging
@@ -25,18 +29,72 @@ logging.basicConfig(
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
 )
 
+# Uploads are copied to disk in 1 MiB chunks rather than buffered whole in memory
+UPLOAD_COPY_CHUNK_BYTES = 1024 * 1024
+
+STATUS_PAGE_SIZES = [50, 200, 1000]
+
 st.title("📚 Spotlight Academy - Content Ingestion (Admin Panel)")
 st.markdown("**Sprint 1: Content Ingestion Prototype**")
 
-# Initialize session state
-if "pipeline" not in st.session_state:
-    try:
-        st.session_state.pipeline = IngestionPipeline()
-        st.success("✅ Ingestion pipeline initialized")
-    except Exception as e:
-        st.error(f"❌ Error initializing pipeline: {str(e)}")
-        st.info("Please check your .env file and ensure all API keys are configured.")
-        st.stop()
+# Shared pipeline (Supabase, embedding clients) reused across sessions and reruns
+@st.cache_resource(show_spinner="Initializing ingestion pipeline...")
+def get_pipeline() -> IngestionPipeline:
+    return IngestionPipeline()
+
+try:
+    pipeline = get_pipeline()
+except Exception as e:
+    st.error(f"❌ Error initializing pipeline: {str(e)}")
+    st.info("Please check your .env file and ensure all API keys are configured.")
+    st.stop()
+
+def extract_supported_members(zip_path: Path, extract_dir: Path):
+    """Stream supported archive members to disk one at a time, skipping everything else."""
+    root = extract_dir.resolve()
+    with zipfile.ZipFile(zip_path, "r") as zip_ref:
+        for member in zip_ref.infolist():
+            if member.is_dir() or Path(member.filename).suffix.lower() not in SUPPORTED_EXTENSIONS:
+                continue
+            target = (extract_dir / member.filename).resolve()
+            # Never write outside the extraction folder (e.g. "../" entries)
+            if not target.is_relative_to(root):
+                logging.warning(f"Skipping unsafe archive member: {member.filename}")
+                continue
+            target.parent.mkdir(parents=True, exist_ok=True)
+            with zip_ref.open(member) as src, open(target, "wb") as dst:
+                shutil.copyfileobj(src, dst, length=UPLOAD_COPY_CHUNK_BYTES)
+
+@st.cache_data(ttl=30, show_spinner=False)
+def load_status_page(source_file, page, page_size):
+    """One page of ingestion status rows; repeat loads within the TTL skip the database."""
+    return pipeline.get_ingestion_status(
+        source_file=source_file, limit=page_size, offset=page * page_size
+    )
+
+# Background fetches of the next status page, shared by all admin sessions
+@st.cache_resource
+def get_status_prefetcher() -> ThreadPoolExecutor:
+    return ThreadPoolExecutor(max_workers=2, thread_name_prefix="status-prefetch")
+
+def prefetch_status_page(source_file, page, page_size):
+    """Start fetching a status page in the background, so Next doesn't wait on Supabase."""
+    future = get_status_prefetcher().submit(
+        pipeline.get_ingestion_status,
+        source_file=source_file, limit=page_size, offset=page * page_size,
+    )
+    st.session_state.status_prefetch = ((source_file, page, page_size), future)
+
+def fetch_status_page(source_file, page, page_size):
+    """One page of status rows, taken from the background prefetch when it fetched this page."""
+    view = (source_file, page, page_size)
+    prefetched = st.session_state.pop("status_prefetch", None)
+    if prefetched is not None and prefetched[0] == view:
+        try:
+            return prefetched[1].result()
+        except Exception as e:
+            logging.warning(f"Status page prefetch failed, fetching again: {str(e)}")
+    return load_status_page(*view)
 
 def render_ingestion_results(results):
     """Display ingestion summary and per-file details."""
@@ -47,9 +105,14 @@ def render_ingestion_results(results):
     success_count = sum(1 for r in results if r.get("success"))
     total_count = len(results)
     st.success(f"✅ Processed {success_count}/{total_count} files")
+    if pipeline.vector_index_missing:
+        st.warning("⚠️ The vector index could not be rebuilt after this bulk load; rebuild it above.")
 
     for result in results:
-        status_icon = "✅" if result.get("success") else "❌"
+        if result.get("skipped"):
+            status_icon = "⏭️ already ingested"
+        else:
+            status_icon = "✅" if result.get("success") else "❌"
         label = f"{result.get('file_name', 'Unknown')} - {status_icon}"
         with st.expander(label):
             st.json(result)
@@ -65,6 +128,29 @@ with st.sidebar:
     concept = st.text_input("Concept", help="Optional: Concept name")
     version = st.number_input("Version", min_value=1, value=1, step=1)
 
+def run_directory_ingestion(path: str):
+    """Ingest a directory with the sidebar metadata, updating a progress bar per file."""
+    progress = st.progress(0.0, text="Processing directory...")
+
+    def on_progress(completed, total, result):
+        progress.progress(
+            completed / total,
+            text=f"Processed {completed}/{total}: {result.get('file_name', 'Unknown')}",
+        )
+
+    try:
+        return pipeline.ingest_directory(
+            path,
+            module=module or None,
+            chapter=chapter or None,
+            lesson=lesson or None,
+            concept=concept or None,
+            version=int(version),
+            progress_callback=on_progress,
+        )
+    finally:
+        progress.empty()
+
 # Main content area
 tab1, tab2, tab3 = st.tabs(["📤 Upload File", "📁 Process Directory", "📊 Ingestion Status"])
 
@@ -82,26 +168,41 @@ with tab1:
         st.info(f"📄 File: {uploaded_file.name} ({uploaded_file.size / 1024:.2f} KB)")
 
         if st.button("🚀 Ingest File", type="primary"):
-            # Save uploaded file temporarily
-            temp_dir = Path("temp_uploads")
-            temp_dir.mkdir(exist_ok=True)
-            temp_path = temp_dir / uploaded_file.name
+            metadata_kwargs = dict(
+                module=module or None,
+                chapter=chapter or None,
+                lesson=lesson or None,
+                concept=concept or None,
+                version=int(version),
+            )
+            temp_path = None
 
             try:
-                with open(temp_path, "wb") as f:
-                    f.write(uploaded_file.getbuffer())
-
-                with st.spinner("Processing file..."):
-                    result = st.session_state.pipeline.ingest_file(
-                        str(temp_path),
-                        module=module or None,
-                        chapter=chapter or None,
-                        lesson=lesson or None,
-                        concept=concept or None,
-                        version=int(version),
-                    )
-
-                if result.get("success"):
+                if uploaded_file.size < Config.INMEMORY_THRESHOLD_MB * 1024 * 1024:
+                    # Small files are parsed straight from the upload buffer
+                    with st.spinner("Processing file..."):
+                        result = pipeline.ingest_bytes(
+                            uploaded_file.getvalue(), uploaded_file.name, **metadata_kwargs
+                        )
+                else:
+                    # Save uploaded file temporarily
+                    temp_dir = Path("temp_uploads")
+                    temp_dir.mkdir(exist_ok=True)
+                    temp_path = temp_dir / uploaded_file.name
+
+                    uploaded_file.seek(0)
+                    with open(temp_path, "wb") as f:
+                        shutil.copyfileobj(uploaded_file, f, length=UPLOAD_COPY_CHUNK_BYTES)
+
+                    # Large files overlap embedding and storage across chunk batches
+                    with st.spinner("Processing file..."):
+                        result = asyncio.run(
+                            pipeline.ingest_file_async(str(temp_path), **metadata_kwargs)
+                        )
+
+                if result.get("skipped"):
+                    st.info(f"⏭️ {result['file_name']} was already ingested: {result['message']}")
+                elif result.get("success"):
                     st.success(f"✅ Successfully ingested {result['file_name']}")
                     st.json(result)
                 else:
@@ -112,7 +213,7 @@ with tab1:
                 st.error(f"❌ Error: {str(e)}")
             finally:
                 # Clean up temp file
-                if temp_path.exists():
+                if temp_path is not None and temp_path.exists():
                     temp_path.unlink()
 
 with tab2:
@@ -122,6 +223,19 @@ with tab2:
         "all supported files (PDF, DOCX, PPTX, PNG, JPG, JPEG). Subfolders are scanned automatically."
     )
 
+    if pipeline.vector_index_missing:
+        st.warning(
+            "⚠️ The vector index was not rebuilt after the last bulk load, so search is slow "
+            "until it is recreated."
+        )
+        if st.button("🔧 Rebuild vector index", key="rebuild_index"):
+            with st.spinner("Rebuilding vector index..."):
+                rebuilt = pipeline.rebuild_vector_index()
+            if rebuilt:
+                st.success("✅ Vector index rebuilt")
+            else:
+                st.error("❌ Rebuild failed; check the logs and SUPABASE_SERVICE_KEY")
+
     # Option 1: process an existing directory on the server
     st.subheader("Use a server directory path")
     directory_path = st.text_input(
@@ -134,15 +248,7 @@ with tab2:
             st.warning("Please enter a directory path")
         else:
             try:
-                with st.spinner("Processing directory..."):
-                    results = st.session_state.pipeline.ingest_directory(
-                        directory_path,
-                        module=module or None,
-                        chapter=chapter or None,
-                        lesson=lesson or None,
-                        concept=concept or None,
-                        version=int(version),
-                    )
+                results = run_directory_ingestion(directory_path)
 
                 render_ingestion_results(results)
 
@@ -174,23 +280,15 @@ with tab2:
 
             try:
                 # Save the uploaded zip
+                uploaded_zip.seek(0)
                 with open(zip_path, "wb") as f:
-                    f.write(uploaded_zip.getbuffer())
+                    shutil.copyfileobj(uploaded_zip, f, length=UPLOAD_COPY_CHUNK_BYTES)
 
-                # Extract contents
+                # Extract supported files only
                 extract_dir.mkdir(exist_ok=True)
-                with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                    zip_ref.extractall(extract_dir)
-
-                with st.spinner("Processing uploaded folder..."):
-                    results = st.session_state.pipeline.ingest_directory(
-                        str(extract_dir),
-                        module=module or None,
-                        chapter=chapter or None,
-                        lesson=lesson or None,
-                        concept=concept or None,
-                        version=int(version),
-                    )
+                extract_supported_members(zip_path, extract_dir)
+
+                results = run_directory_ingestion(str(extract_dir))
 
                 render_ingestion_results(results)
 
@@ -208,18 +306,51 @@ with tab3:
         "Filter by Source File (optional)",
         help="Leave empty to see all ingested files",
     )
+    page_size = st.selectbox("Rows per page", STATUS_PAGE_SIZES, index=1)
+
+    # Start from the first page whenever the filter or page size changes
+    status_key = (source_file_filter, page_size)
+    if st.session_state.get("status_key") != status_key:
+        st.session_state.status_key = status_key
+        st.session_state.status_page = 0
 
     if st.button("🔄 Refresh Status"):
+        load_status_page.clear()
+        st.session_state.status_loaded = True
+        st.session_state.pop("status_rows", None)
+        st.session_state.pop("status_prefetch", None)
+
+    # Tabs render on every rerun, so Supabase is only queried after Refresh and
+    # when the page, filter or page size changes, not on each upload interaction
+    if st.session_state.get("status_loaded"):
         try:
-            status_data = st.session_state.pipeline.get_ingestion_status(
-                source_file=source_file_filter if source_file_filter else None
-            )
+            page = st.session_state.status_page
+            view = (source_file_filter or None, page, page_size)
+            shown = st.session_state.get("status_rows")
+            if shown is None or shown[0] != view:
+                shown = st.session_state.status_rows = (view, fetch_status_page(*view))
+                # A full page may have a next one; fetch it while this one is read
+                if len(shown[1]) == page_size:
+                    prefetch_status_page(view[0], page + 1, page_size)
+            status_data = shown[1]
 
             if status_data:
                 st.dataframe(status_data)
-            else:
+            elif page == 0:
                 st.info("No ingestion records found.")
 
+            prev_col, page_col, next_col = st.columns([1, 2, 1])
+            with prev_col:
+                if st.button("⬅️ Previous", disabled=page == 0):
+                    st.session_state.status_page -= 1
+                    st.rerun()
+            with page_col:
+                st.caption(f"Page {page + 1}")
+            with next_col:
+                if st.button("Next ➡️", disabled=len(status_data) < page_size):
+                    st.session_state.status_page += 1
+                    st.rerun()
+
         except Exception as e:
             st.error(f"❌ Error: {str(e)}")
 
@@ -1,18 +1,45 @@
 """
 Supabase client setup and vector database operations
 """
+import threading
+from functools import cached_property
+from typing import Dict, List, Union
+
+import numpy as np
+import orjson
 from supabase import create_client, Client
 from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Seconds to wait for a pooled COPY connection before falling back to inserts
+PG_POOL_TIMEOUT = 5.0
+
+# Columns returned to retrieval callers (never the 768-float embedding)
+SEARCH_RESULT_COLUMNS = "id, content, metadata, module, chapter, lesson, concept, source_file, version"
+
+
+def _vector_literal(embedding) -> str:
+    """
+    Encode an embedding as pgvector's '[x,y,...]' text form using orjson.
+
+    Sending one string per row is much cheaper for the client's stdlib JSON
+    encoder than a list of hundreds of floats; NumPy arrays are accepted as-is.
+    """
+    return orjson.dumps(embedding, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
 class SupabaseClient:
     """Manages Supabase connection and vector operations"""
     
     def __init__(self):
         Config.validate()
+        # One client per instance: its PostgREST session keeps connections alive across calls
         self.client: Client = create_client(Config.SUPABASE_URL, Config.SUPABASE_KEY)
+        # Direct Postgres connections for COPY, pooled on first use (see _pg_connection_pool)
+        self._pg_pool = None
+        self._pg_pool_lock = threading.Lock()
         self._ensure_table_exists()
     
     def _ensure_table_exists(self):
@@ -31,11 +58,28 @@ class SupabaseClient:
         #   concept TEXT,
         #   source_file TEXT,
         #   version INTEGER DEFAULT 1,
+        #   file_hash TEXT,
         #   created_at TIMESTAMP DEFAULT NOW(),
         #   updated_at TIMESTAMP DEFAULT NOW()
         # );
         logger.info("Supabase client initialized")
     
+    @staticmethod
+    def _build_row(content: str, embedding: list, metadata: dict) -> dict:
+        """Build a course_content row from a chunk, its embedding and metadata"""
+        return {
+            "content": content,
+            "embedding": _vector_literal(embedding),
+            "metadata": metadata,
+            "module": metadata.get("module", ""),
+            "chapter": metadata.get("chapter", ""),
+            "lesson": metadata.get("lesson", ""),
+            "concept": metadata.get("concept", ""),
+            "source_file": metadata.get("source_file", ""),
+            "version": metadata.get("version", 1),
+            "file_hash": metadata.get("file_hash")
+        }
+    
     def insert_embedding(self, content: str, embedding: list, metadata: dict):
         """
         Insert a chunk with its embedding into the vector database
@@ -46,18 +90,7 @@ class SupabaseClient:
             metadata: Dictionary containing module, chapter, lesson, concept, source_file, etc.
         """
         try:
-            data = {
-                "content": content,
-                "embedding": embedding,
-                "metadata": metadata,
-                "module": metadata.get("module", ""),
-                "chapter": metadata.get("chapter", ""),
-                "lesson": metadata.get("lesson", ""),
-                "concept": metadata.get("concept", ""),
-                "source_file": metadata.get("source_file", ""),
-                "version": metadata.get("version", 1)
-            }
-            
+            data = self._build_row(content, embedding, metadata)
             result = self.client.table("course_content").insert(data).execute()
             logger.info(f"Inserted embedding for content chunk: {metadata.get('source_file', 'unknown')}")
             return result
@@ -65,12 +98,154 @@ class SupabaseClient:
             logger.error(f"Error inserting embedding: {str(e)}")
             raise
     
-    def search_similar(self, query_embedding: list, top_k: int = 8, filters: dict = None, match_threshold: float = 0.7):
+    def insert_embeddings_bulk(self, records: List[dict], batch_size: int = None) -> int:
+        """
+        Insert many chunks with one multi-row INSERT per batch
+        
+        If a batch is rejected, its rows are retried one at a time so a single
+        bad row only loses itself; rows that still fail are logged and skipped.
+        
+        Args:
+            records: Dicts with "content", "embedding" and "metadata" keys
+            batch_size: Rows per request (defaults to Config.SUPABASE_INSERT_BATCH_SIZE)
+        
+        Returns:
+            Number of rows inserted
+        """
+        batch_size = batch_size or Config.SUPABASE_INSERT_BATCH_SIZE
+        rows = [
+            self._build_row(r["content"], r["embedding"], r["metadata"]) for r in records
+        ]
+        inserted = 0
+        for start in range(0, len(rows), batch_size):
+            batch = rows[start:start + batch_size]
+            try:
+                # PostgREST inserts an array body in a single statement
+                self.client.table("course_content").insert(batch).execute()
+                inserted += len(batch)
+                continue
+            except Exception as e:
+                logger.warning(f"Bulk insert of {len(batch)} rows failed ({str(e)}); retrying row by row")
+            for row in batch:
+                try:
+                    self.client.table("course_content").insert(row).execute()
+                    inserted += 1
+                except Exception as e:
+                    logger.error(f"Error inserting embedding for {row['source_file']}: {str(e)}")
+        logger.debug(f"Bulk inserted {inserted}/{len(rows)} embeddings")
+        return inserted
+    
+    def _pg_connection_pool(self):
+        """
+        Pool of direct Postgres connections for COPY, opened on first use
+        
+        The client owns the pool, so connections are reused across files,
+        directory ingests and store threads (up to Config.INGEST_STORE_WORKERS
+        at once), and broken ones are replaced instead of being handed out.
+        """
+        with self._pg_pool_lock:
+            if self._pg_pool is None:
+                from psycopg_pool import ConnectionPool
+                
+                self._pg_pool = ConnectionPool(
+                    Config.DIRECT_PG_URL,
+                    min_size=1,
+                    max_size=max(1, Config.INGEST_STORE_WORKERS),
+                    kwargs={"autocommit": True},
+                    timeout=PG_POOL_TIMEOUT,
+                    name="course-content-copy",
+                )
+            return self._pg_pool
+    
+    def bulk_copy_embeddings(self, records: List[dict]) -> int:
+        """
+        Load many chunks with Postgres COPY over a direct connection
+        
+        COPY streams rows without per-statement parse/plan overhead. Falls back
+        to insert_embeddings_bulk when Config.DIRECT_PG_URL is not set, psycopg
+        is not installed, or the COPY fails (COPY is all-or-nothing, the
+        batched inserts can isolate a bad row).
+        
+        Args:
+            records: Dicts with "content", "embedding" and "metadata" keys
+        
+        Returns:
+            Number of rows inserted
+        """
+        if not Config.DIRECT_PG_URL:
+            return self.insert_embeddings_bulk(records)
+        try:
+            from psycopg.types.json import Jsonb
+            pool = self._pg_connection_pool()
+        except ImportError:
+            logger.warning("psycopg or psycopg_pool not installed; falling back to batched inserts")
+            return self.insert_embeddings_bulk(records)
+        
+        columns = (
+            "content", "embedding", "metadata", "module", "chapter",
+            "lesson", "concept", "source_file", "version", "file_hash"
+        )
+        copy_sql = f"COPY course_content ({', '.join(columns)}) FROM STDIN"
+        try:
+            # Pooled connections let each file skip the TCP/TLS handshake
+            with pool.connection() as conn, conn.transaction(), conn.cursor() as cur, \
+                    cur.copy(copy_sql) as copy:
+                for r in records:
+                    row = self._build_row(r["content"], r["embedding"], r["metadata"])
+                    row["metadata"] = Jsonb(row["metadata"])
+                    copy.write_row([row[c] for c in columns])
+            logger.debug(f"Copied {len(records)} embeddings")
+            return len(records)
+        except Exception as e:
+            logger.warning(f"COPY of {len(records)} embeddings failed ({str(e)}); falling back to batched inserts")
+            return self.insert_embeddings_bulk(records)
+    
+    @cached_property
+    def _service_client(self) -> Client:
+        """
+        Client authenticated with the service role key, built on first use
+        
+        The index drop/rebuild functions are only granted to service_role, while
+        self.client usually carries the anon key.
+        """
+        if not Config.SUPABASE_SERVICE_KEY:
+            raise ValueError("SUPABASE_SERVICE_KEY is required for bulk load index management")
+        return create_client(Config.SUPABASE_URL, Config.SUPABASE_SERVICE_KEY)
+    
+    def begin_bulk_load(self):
+        """Drop the vector index so a large load does not maintain it row by row"""
+        try:
+            self._service_client.rpc("drop_course_content_embedding_index", {}).execute()
+            logger.info("Dropped vector index for bulk load")
+        except Exception as e:
+            logger.error(f"Error dropping vector index: {str(e)}")
+            raise
+    
+    def end_bulk_load(self, m: int = None, ef_construction: int = None):
+        """Rebuild the HNSW vector index after a bulk load"""
+        try:
+            self._service_client.rpc("create_course_content_hnsw_index", {
+                "m": m or Config.HNSW_M,
+                "ef_construction": ef_construction or Config.HNSW_EF_CONSTRUCTION
+            }).execute()
+            logger.info("Rebuilt vector index after bulk load")
+        except Exception as e:
+            logger.error(f"Error rebuilding vector index: {str(e)}")
+            raise
+    
+    @staticmethod
+    def vector_literal(embedding) -> str:
+        """pgvector text form of an embedding, for callers that reuse one vector across searches"""
+        return _vector_literal(embedding)
+    
+    def search_similar(
+        self, query_embedding: Union[list, str], top_k: int = 8, filters: dict = None, match_threshold: float = 0.7
+    ):
         """
         Search for similar content using vector similarity
         
         Args:
-            query_embedding: The query embedding vector
+            query_embedding: The query embedding vector, or its vector_literal
             top_k: Number of results to return
             filters: Optional filters (module, chapter, lesson)
             match_threshold: Minimum similarity threshold (0-1)
@@ -82,7 +257,9 @@ class SupabaseClient:
             # Use the RPC function for vector similarity search
             # This calls the match_course_content function defined in the migration
             rpc_params = {
-                "query_embedding": query_embedding,
+                "query_embedding": (
+                    query_embedding if isinstance(query_embedding, str) else _vector_literal(query_embedding)
+                ),
                 "match_threshold": match_threshold,
                 "match_count": top_k
             }
@@ -109,7 +286,8 @@ class SupabaseClient:
         Uses ILIKE on the content field to approximate keyword search.
         """
         try:
-            q = self.client.table("course_content").select("*")
+            # Same columns match_course_content returns; embedding and hash columns stay server-side
+            q = self.client.table("course_content").select(SEARCH_RESULT_COLUMNS)
 
             # Basic keyword search on content
             if query:
@@ -142,16 +320,102 @@ class SupabaseClient:
             logger.error(f"Error deleting by source: {str(e)}")
             raise
     
-    def get_ingestion_status(self, source_file: str = None):
-        """Get ingestion status for files"""
+    def delete_by_file_hash(self, file_hash: str, version: int):
+        """Delete the chunks stored for one ingestion of a file (e.g. after a partial failure)"""
+        try:
+            result = (
+                self.client.table("course_content")
+                .delete()
+                .eq("file_hash", file_hash)
+                .eq("version", version)
+                .execute()
+            )
+            logger.info(f"Deleted chunks for file hash {file_hash} (version {version})")
+            return result
+        except Exception as e:
+            logger.error(f"Error deleting by file hash: {str(e)}")
+            raise
+    
+    def has_file_hash(self, file_hash: str, version: int) -> bool:
+        """Check whether a file with this content hash was already ingested at this version"""
+        try:
+            result = (
+                self.client.table("course_content")
+                .select("id")
+                .eq("file_hash", file_hash)
+                .eq("version", version)
+                .limit(1)
+                .execute()
+            )
+            return bool(result.data)
+        except Exception as e:
+            logger.error(f"Error checking file hash: {str(e)}")
+            raise
+    
+    def lookup_embedding_cache(self, hashes: List[str], model: str, batch_size: int = 100) -> Dict[str, np.ndarray]:
+        """
+        Look up cached embeddings for chunk texts by their SHA-256 hex digests
+        
+        Returns:
+            Mapping of hash to embedding (float32 NumPy row, like freshly
+            generated ones) for the hashes found for this model
+        """
+        found = {}
+        try:
+            for start in range(0, len(hashes), batch_size):
+                result = (
+                    self.client.table("embedding_cache")
+                    .select("hash, embedding")
+                    .eq("model", model)
+                    .in_("hash", hashes[start:start + batch_size])
+                    .execute()
+                )
+                for row in result.data or []:
+                    embedding = row["embedding"]
+                    # PostgREST returns pgvector values in their '[x,y,...]' text form
+                    if isinstance(embedding, str):
+                        embedding = orjson.loads(embedding)
+                    found[row["hash"]] = np.asarray(embedding, dtype=np.float32)
+            return found
+        except Exception as e:
+            logger.error(f"Error looking up embedding cache: {str(e)}")
+            raise
+    
+    def store_embedding_cache(self, embeddings: Dict[str, np.ndarray], model: str):
+        """Upsert embeddings into the cache, keyed by chunk text hash and model"""
+        if not embeddings:
+            return
+        try:
+            rows = [
+                {"hash": content_hash, "model": model, "embedding": _vector_literal(embedding)}
+                for content_hash, embedding in embeddings.items()
+            ]
+            self.client.table("embedding_cache").upsert(rows, on_conflict="hash,model").execute()
+        except Exception as e:
+            logger.error(f"Error storing embedding cache: {str(e)}")
+            raise
+    
+    def get_ingestion_status(self, source_file: str = None, limit: int = 200, offset: int = 0):
+        """
+        Get one page of ingestion status rows, newest first
+        
+        Args:
+            source_file: Optional source file to filter by
+            limit: Maximum number of rows to return
+            offset: Number of rows to skip
+        """
         try:
             query = self.client.table("course_content").select("source_file, created_at, version")
             if source_file:
                 query = query.eq("source_file", source_file)
             
-            result = query.execute()
-            return result.data
+            result = (
+                query.order("created_at", desc=True)
+                .order("id")
+                .range(offset, offset + limit - 1)
+                .execute()
+            )
+            return result.data or []
         except Exception as e:
             logger.error(f"Error getting ingestion status: {str(e)}")
             raise
-
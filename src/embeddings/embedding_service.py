@@ -2,12 +2,68 @@
 Embedding service with Google Gemini (default) and local fallback option.
 """
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, lru_cache
+
 import numpy as np
 
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Concurrent single-text requests used when list content is not supported
+GOOGLE_FALLBACK_WORKERS = 8
+
+
+@lru_cache(maxsize=None)
+def _configure_genai(api_key: str):
+    """
+    Configure the Gemini SDK once per process and return the module.
+
+    Re-running genai.configure drops the SDK's cached clients, so every new
+    EmbeddingService would otherwise reconnect instead of reusing the channel.
+    """
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    return genai
+
+
+@lru_cache(maxsize=None)
+def _genai_client(api_key: str):
+    """
+    Return the Gemini SDK's generative-service client, held for the process.
+
+    Passing it to embed_content explicitly keeps batched and parallel calls on
+    one pooled gRPC (HTTP/2) channel, even if another module calls
+    genai.configure again and the SDK discards its default clients.
+    """
+    from google.generativeai.client import get_default_generative_client
+
+    _configure_genai(api_key)
+    return get_default_generative_client()
+
+
+@lru_cache(maxsize=None)
+def _load_local_model(model_name: str):
+    """Load a SentenceTransformer once per process and share it across services"""
+    from sentence_transformers import SentenceTransformer
+
+    return SentenceTransformer(model_name)
+
+
+@lru_cache(maxsize=None)
+def _batch_pool() -> ThreadPoolExecutor:
+    """
+    Thread pool shared by embed_batch across every service in the process.
+
+    One pool bounds the batches in flight process-wide to
+    Config.EMBED_CONCURRENCY, and its threads persist, so each keeps reusing
+    its pad buffer. Worker threads exit with the interpreter.
+    """
+    return ThreadPoolExecutor(max_workers=Config.EMBED_CONCURRENCY, thread_name_prefix="embed")
+
 
 class EmbeddingService:
     """Service for generating embeddings with optional local fallback."""
@@ -22,6 +78,8 @@ class EmbeddingService:
 
         self._google_ready = False
         self._local_model = None
+        # Per-thread float32 staging buffer reused by _pad_or_trim_batch
+        self._pad_buffers = threading.local()
 
         if self.provider == "google":
             self._init_google()
@@ -37,33 +95,79 @@ class EmbeddingService:
             self.local_model_name,
         )
 
-    def _init_google(self):
-        import google.generativeai as genai
+    @property
+    def model_name(self) -> str:
+        """Name of the model producing this service's embeddings"""
+        if self.provider == "google":
+            return self.google_model_name
+        return self.local_model_name
 
-        genai.configure(api_key=Config.GOOGLE_API_KEY)
-        self.genai = genai
+    @cached_property
+    def dimensions(self) -> int:
+        """Length of every embedding this service returns (padded or trimmed to match the DB)"""
+        return self.target_dim
+
+    def _init_google(self):
+        self.genai = _configure_genai(Config.GOOGLE_API_KEY)
+        self._genai_client = _genai_client(Config.GOOGLE_API_KEY)
         self._google_ready = True
 
     def _init_local(self):
-        from sentence_transformers import SentenceTransformer
-
-        # Lazy-load model
-        self._local_model = SentenceTransformer(self.local_model_name)
-
-    def _pad_or_trim(self, vec: list) -> list:
-        """Pad or trim embedding to target_dim for DB compatibility."""
-        arr = np.array(vec, dtype=float)
-        if len(arr) == self.target_dim:
-            return arr.tolist()
-        if len(arr) > self.target_dim:
-            return arr[: self.target_dim].tolist()
-        # pad with zeros
-        pad_width = self.target_dim - len(arr)
-        return np.pad(arr, (0, pad_width)).tolist()
-
-    def generate_embedding(self, text: str, task_type: str = "retrieval_document") -> list:
+        # Lazy-load model; RAG and ingestion services in one process share it
+        self._local_model = _load_local_model(self.local_model_name)
+
+    def _pad_or_trim(self, vec: list) -> np.ndarray:
+        """Pad or trim embedding to target_dim (float32) for DB compatibility."""
+        arr = np.asarray(vec, dtype=np.float32)
+        if arr.size == self.target_dim:
+            return arr
+        # Single zero-filled allocation covers both padding and trimming
+        out = np.zeros(self.target_dim, dtype=np.float32)
+        n = min(arr.size, self.target_dim)
+        out[:n] = arr[:n]
+        return out
+
+    def _pad_or_trim_batch(self, vectors) -> np.ndarray:
+        """
+        Pad or trim a batch of embeddings to target_dim in a reused float32 buffer.
+
+        The result is a view of a per-thread buffer that the next call
+        overwrites, so callers must normalize or copy it before the next batch.
+        """
+        rows = len(vectors)
+        buf = getattr(self._pad_buffers, "buf", None)
+        if buf is None or buf.shape[0] < rows:
+            buf = np.empty((rows, self.target_dim), dtype=np.float32)
+            self._pad_buffers.buf = buf
+        out = buf[:rows]
+        out.fill(0)
+        if not isinstance(vectors, np.ndarray) and rows and len({len(vec) for vec in vectors}) == 1:
+            # Equal-length lists (the normal API response) convert in one C-level pass
+            vectors = np.asarray(vectors, dtype=np.float32)
+        if isinstance(vectors, np.ndarray):
+            n = min(vectors.shape[1], self.target_dim)
+            out[:, :n] = vectors[:, :n]
+        else:
+            for i, vec in enumerate(vectors):
+                n = min(len(vec), self.target_dim)
+                out[i, :n] = vec[:n]
+        return out
+
+    @staticmethod
+    def _normalize(vectors) -> np.ndarray:
+        """
+        L2-normalize embeddings (last axis) so inner product equals cosine similarity.
+
+        Lets the database rank with the cheaper inner product operator.
+        """
+        arr = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(arr, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return arr / norms
+
+    def generate_embedding(self, text: str, task_type: str = "retrieval_document") -> np.ndarray:
         """
-        Generate embedding for a text chunk.
+        Generate a unit-length embedding for a text chunk, as a float32 NumPy row.
 
         If provider=google and it fails (e.g., 429), we raise so caller can decide
         whether to stop or fall back.
@@ -72,8 +176,11 @@ class EmbeddingService:
             raise ValueError("Text cannot be empty")
 
         if self.provider == "google":
-            return self._generate_google(text, task_type)
-        return self._generate_local(text)
+            embedding = self._pad_or_trim(self._generate_google(text, task_type))
+        else:
+            embedding = self._generate_local(text)
+        # Same type as generate_embeddings_batch rows, so embed_batch results never mix
+        return self._normalize(embedding)
 
     def _generate_google(self, text: str, task_type: str) -> list:
         try:
@@ -81,6 +188,7 @@ class EmbeddingService:
                 model=self.google_model_name,
                 content=text,
                 task_type=task_type,
+                client=self._genai_client,
             )
             embedding = result["embedding"]
             return embedding
@@ -88,19 +196,104 @@ class EmbeddingService:
             logger.error(f"Error generating Google embedding: {str(e)}")
             raise
 
-    def _generate_local(self, text: str) -> list:
+    def _generate_local(self, text: str) -> np.ndarray:
         if self._local_model is None:
             self._init_local()
         try:
-            embedding = self._local_model.encode(text).tolist()
+            embedding = self._local_model.encode(text, convert_to_numpy=True)
             return self._pad_or_trim(embedding)
         except Exception as e:
             logger.error(f"Error generating local embedding: {str(e)}")
             raise
 
-    def generate_embeddings_batch(self, texts: list) -> list:
+    def generate_embeddings_batch(
+        self,
+        texts: list,
+        task_type: str = "retrieval_document",
+        batch_size: int = None,
+    ) -> list:
+        """
+        Generate unit-length embeddings for many texts, one API call per batch.
+
+        Returns embeddings in the same order as ``texts``, as float32 NumPy
+        rows; they serialize straight to pgvector literals without a
+        per-float Python list.
+        """
+        if any(not text or not text.strip() for text in texts):
+            raise ValueError("Text cannot be empty")
+
+        batch_size = batch_size or Config.EMBEDDING_BATCH_SIZE
+        embeddings = []
+        for start in range(0, len(texts), batch_size):
+            batch = texts[start : start + batch_size]
+            if self.provider == "google":
+                padded = self._pad_or_trim_batch(self._generate_google_batch(batch, task_type))
+            else:
+                padded = self._generate_local_batch(batch)
+            # Normalizing copies out of the shared pad buffer before it is reused
+            embeddings.extend(self._normalize(padded))
+        return embeddings
+
+    def embed_batch(self, texts: list, task_type: str = "retrieval_document") -> list:
+        """
+        Embed texts in provider-sized batches, tolerating individual failures.
+
+        Up to Config.EMBED_CONCURRENCY batches are in flight at once across all
+        callers in the process. A failed batch is retried one text at a time;
+        texts that still fail come back as None so callers can skip just those
+        chunks.
+        """
+        batch_size = Config.EMBEDDING_BATCH_SIZE
+        batches = [texts[start : start + batch_size] for start in range(0, len(texts), batch_size)]
+        if len(batches) <= 1:
+            results = [self._embed_sub_batch(batch, task_type) for batch in batches]
+        else:
+            results = list(_batch_pool().map(lambda batch: self._embed_sub_batch(batch, task_type), batches))
+        return [embedding for result in results for embedding in result]
+
+    def _embed_sub_batch(self, batch: list, task_type: str) -> list:
+        try:
+            return self.generate_embeddings_batch(batch, task_type)
+        except Exception as e:
+            logger.warning(f"Embedding batch failed ({e}); retrying {len(batch)} texts individually")
         embeddings = []
-        for text in texts:
-            embeddings.append(self.generate_embedding(text))
+        for text in batch:
+            try:
+                embeddings.append(self.generate_embedding(text, task_type))
+            except Exception as e:
+                logger.error(f"Error embedding text: {str(e)}")
+                embeddings.append(None)
         return embeddings
 
+    def _generate_google_batch(self, texts: list, task_type: str) -> list:
+        try:
+            result = self.genai.embed_content(
+                model=self.google_model_name,
+                content=texts,
+                task_type=task_type,
+                client=self._genai_client,
+            )
+            embeddings = result["embedding"]
+            # Older SDKs treat a list as one content and return a single vector
+            if len(embeddings) == len(texts) and isinstance(embeddings[0], (list, tuple)):
+                return embeddings
+            logger.warning("Batch embed_content returned an unexpected shape; embedding texts individually")
+        except Exception as e:
+            logger.warning(f"Batch embed_content failed ({e}); embedding texts individually")
+
+        # Overlap the per-text round trips instead of issuing them serially
+        with ThreadPoolExecutor(max_workers=GOOGLE_FALLBACK_WORKERS) as pool:
+            return list(pool.map(lambda text: self._generate_google(text, task_type), texts))
+
+    def _generate_local_batch(self, texts: list) -> np.ndarray:
+        if self._local_model is None:
+            self._init_local()
+        try:
+            embeddings = self._local_model.encode(
+                texts, batch_size=64, convert_to_numpy=True, normalize_embeddings=False
+            )
+            return self._pad_or_trim_batch(embeddings)
+        except Exception as e:
+            logger.error(f"Error generating local embeddings batch: {str(e)}")
+            raise
+
@@ -12,6 +12,43 @@ import re
 
 IntentLabel = Literal["concept_question", "hint_request", "solution_seeking"]
 
+# Explicit hint-style requests
+HINT_PATTERNS = (
+    r"\bgive me a hint\b",
+    r"\bany hints?\b",
+    r"\bclue\b",
+    r"\bhelp me get started\b",
+)
+
+# Obvious solution-seeking patterns
+SOLUTION_PATTERNS = (
+    r"\bgive me the answer\b",
+    r"\bwhat is the answer\b",
+    r"\bcomplete solution\b",
+    r"\bfull solution\b",
+    r"\bsolve this for me\b",
+    r"\bwrite the code\b",
+    r"\bdo my homework\b",
+    r"\bproject code\b",
+    r"\bsubmit this\b",
+)
+
+# Fallback keywords: task words suggest solution-seeking unless paired with a
+# concept word
+TASK_KEYWORDS = ("assignment", "homework", "project")
+CONCEPT_KEYWORDS = ("explain", "understand", "concept")
+
+# Compiled once at import into a single alternation with one named group per
+# category, so a message is scanned once for both categories
+_INTENT_RE = re.compile(
+    f"(?P<hint_request>{'|'.join(HINT_PATTERNS)})"
+    f"|(?P<solution_seeking>{'|'.join(SOLUTION_PATTERNS)})"
+)
+# Plain substring keywords, found in one pass instead of one `in` check each
+_KEYWORD_RE = re.compile(
+    f"(?P<task>{'|'.join(TASK_KEYWORDS)})|(?P<concept>{'|'.join(CONCEPT_KEYWORDS)})"
+)
+
 
 def classify_intent(user_message: str) -> IntentLabel:
     """
@@ -20,34 +57,19 @@ def classify_intent(user_message: str) -> IntentLabel:
     """
     text = (user_message or "").lower()
 
-    # Explicit hint-style requests
-    hint_patterns = [
-        r"\bgive me a hint\b",
-        r"\bany hints?\b",
-        r"\bclue\b",
-        r"\bhelp me get started\b",
-    ]
-    if any(re.search(p, text) for p in hint_patterns):
-        return "hint_request"
-
-    # Obvious solution-seeking patterns
-    solution_patterns = [
-        r"\bgive me the answer\b",
-        r"\bwhat is the answer\b",
-        r"\bcomplete solution\b",
-        r"\bfull solution\b",
-        r"\bsolve this for me\b",
-        r"\bwrite the code\b",
-        r"\bdo my homework\b",
-        r"\bproject code\b",
-        r"\bsubmit this\b",
-    ]
-    if any(re.search(p, text) for p in solution_patterns):
+    # Hint requests win over solution-seeking wherever they appear in the text
+    solution_seeking = False
+    for match in _INTENT_RE.finditer(text):
+        if match.lastgroup == "hint_request":
+            return "hint_request"
+        solution_seeking = True
+    if solution_seeking:
         return "solution_seeking"
 
     # Requests that look like they're asking to implement/finish assignments
-    if "assignment" in text or "homework" in text or "project" in text:
-        if "explain" in text or "understand" in text or "concept" in text:
+    keyword_hits = {match.lastgroup for match in _KEYWORD_RE.finditer(text)}
+    if "task" in keyword_hits:
+        if "concept" in keyword_hits:
             return "concept_question"
         return "solution_seeking"
 
@@ -1,139 +1,236 @@
 """
 Text chunking utilities for RAG pipeline
 """
-import tiktoken
+import re
+from functools import lru_cache
+from itertools import islice
+from typing import Iterable, Iterator, Tuple, Union
+
 from config import Config
 import logging
 
 logger = logging.getLogger(__name__)
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_NON_ALNUM_RE = re.compile(r"[\W_]+")
+
+@lru_cache(maxsize=None)
+def _local_model_tokenizer(model_name: str):
+    """Load just the tokenizer of a SentenceTransformer model (no weights), once per process"""
+    from transformers import AutoTokenizer
+    
+    # SentenceTransformer resolves bare names under the sentence-transformers org
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return AutoTokenizer.from_pretrained(repo_id)
+
 class TextChunker:
     """Handles text chunking for RAG pipeline"""
     
     def __init__(self):
-        # Using cl100k_base encoding (used by GPT models) for token counting
-        self.encoding = tiktoken.get_encoding("cl100k_base")
+        if Config.EMBEDDING_PROVIDER.lower() == "local":
+            # Size chunks with the local embedding model's own tokenizer, so the
+            # counts match what the model sees and tiktoken is never loaded
+            tokenizer = _local_model_tokenizer(Config.LOCAL_EMBEDDING_MODEL)
+            self._encode_batch = lambda texts: tokenizer(
+                texts, add_special_tokens=False, verbose=False
+            )["input_ids"]
+        else:
+            import tiktoken
+            
+            # Using cl100k_base encoding (used by GPT models) for token counting
+            self.encoding = tiktoken.get_encoding("cl100k_base")
+            self._encode_batch = self.encoding.encode_batch
+        # Tokens of the separators chunks are joined with, so summed piece
+        # counts also cover the joins
+        self._paragraph_sep_tokens, self._sentence_sep_tokens, self._split_sep_tokens = (
+            self.count_tokens_batch(["\n\n", " ", ". "])
+        )
         self.chunk_size = Config.CHUNK_SIZE
         self.chunk_overlap = Config.CHUNK_OVERLAP
+        self.min_chunk_tokens = Config.MIN_CHUNK_TOKENS
+        self.min_alnum_ratio = Config.MIN_CHUNK_ALNUM_RATIO
     
     def count_tokens(self, text: str) -> int:
         """Count tokens in text"""
-        return len(self.encoding.encode(text))
+        return len(self._encode_batch([text])[0])
+    
+    def count_tokens_batch(self, texts: list) -> list:
+        """Count tokens for many texts with a single batched tokenizer call"""
+        return [len(tokens) for tokens in self._encode_batch(texts)]
     
-    def chunk_text(self, text: str, metadata: dict = None) -> list:
+    def _is_noise(self, text: str, tokens: int) -> bool:
+        """True for chunks too short or too symbol-heavy to be worth embedding (page numbers, TOC dots)"""
+        if tokens < self.min_chunk_tokens:
+            return True
+        visible = _WHITESPACE_RE.sub("", text)
+        if not visible:
+            return True
+        alnum = len(_NON_ALNUM_RE.sub("", visible))
+        return alnum / len(visible) < self.min_alnum_ratio
+    
+    @staticmethod
+    def _split_paragraphs(text: str) -> Iterator[str]:
+        """Yield non-blank paragraphs of text lazily, without building a list of parts"""
+        start = 0
+        length = len(text)
+        while start < length:
+            end = text.find('\n\n', start)
+            if end < 0:
+                end = length
+            part = text[start:end]
+            if part.strip():
+                yield part
+            start = end + 2
+    
+    def _iter_paragraphs(self, text: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Split text, or each block of an iterable of text blocks, on blank lines"""
+        if isinstance(text, str):
+            yield from self._split_paragraphs(text)
+            return
+        for block in text:
+            yield from self._split_paragraphs(block)
+    
+    def _iter_counted(self, texts: Iterable[str], batch_size: int = 256) -> Iterator[Tuple[str, int]]:
+        """Pair each text with its token count, tokenizing in batches as texts arrive"""
+        it = iter(texts)
+        while batch := list(islice(it, batch_size)):
+            yield from zip(batch, self.count_tokens_batch(batch))
+    
+    def chunk_text(self, text: Union[str, Iterable[str]], metadata: dict = None) -> list:
         """
         Split text into semantic chunks of 200-500 tokens
         
         Args:
-            text: The text to chunk
+            text: The text to chunk, or an iterable of text blocks (pages,
+                paragraphs, slides) consumed lazily as if joined by blank lines
             metadata: Optional metadata to attach to each chunk
             
         Returns:
             List of chunk dictionaries with 'content' and 'metadata'
         """
-        if not text or not text.strip():
-            return []
+        final_chunks = list(self.iter_chunks(text, metadata))
+        logger.info(f"Created {len(final_chunks)} chunks from text")
+        return final_chunks
+    
+    def iter_chunks(self, text: Union[str, Iterable[str]], metadata: dict = None) -> Iterator[dict]:
+        """
+        Yield the chunks of chunk_text as the input text is consumed
+        
+        Every paragraph and sentence is tokenized once; chunk sizes are then
+        tracked by summing the cached counts, plus the tokens of the separators
+        they are joined with, instead of re-encoding the growing chunk. Only
+        the last chunk is held back, since a short successor may still be
+        merged into it.
+        """
+        if not text or (isinstance(text, str) and not text.strip()):
+            return
+        metadata = metadata or {}
+        
+        # Ensure chunks are within token limits (200-500)
+        pending = None
+        pending_tokens = 0
+        for content, tokens in self._iter_counted(self._iter_raw_chunks(text), batch_size=64):
+            # Drop noise before it is merged into a neighbour or embedded
+            if self._is_noise(content, tokens):
+                continue
+            if tokens < 200 and pending is not None:
+                # Merge into the previous chunk if it still fits
+                combined_tokens = pending_tokens + self._paragraph_sep_tokens + tokens
+                if combined_tokens <= 500:
+                    pending['content'] += "\n\n" + content
+                    pending_tokens = combined_tokens
+                    continue
+            if tokens > 500:
+                # Split further
+                for sub_chunk, sub_tokens in self._split_large_chunk(content, metadata):
+                    if self._is_noise(sub_chunk['content'], sub_tokens):
+                        continue
+                    if pending is not None:
+                        yield pending
+                    pending, pending_tokens = sub_chunk, sub_tokens
+            else:
+                # Short chunks that could not be merged are kept on their own
+                if pending is not None:
+                    yield pending
+                pending, pending_tokens = {'content': content, 'metadata': metadata}, tokens
         
+        if pending is not None:
+            yield pending
+    
+    def _iter_raw_chunks(self, text: Union[str, Iterable[str]]) -> Iterator[str]:
+        """Pack paragraphs (or sentences of oversized ones) into chunks of up to chunk_size tokens"""
         # Split by paragraphs first for better semantic boundaries
-        paragraphs = text.split('\n\n')
-        chunks = []
         current_chunk = ""
         current_tokens = 0
         
-        for paragraph in paragraphs:
-            para_tokens = self.count_tokens(paragraph)
-            
+        for paragraph, para_tokens in self._iter_counted(self._iter_paragraphs(text)):
             # If paragraph itself is too large, split it further
             if para_tokens > self.chunk_size:
                 # Save current chunk if exists
                 if current_chunk:
-                    chunks.append({
-                        'content': current_chunk.strip(),
-                        'metadata': metadata or {}
-                    })
+                    yield current_chunk.strip()
                     current_chunk = ""
                     current_tokens = 0
                 
                 # Split large paragraph by sentences
                 sentences = paragraph.split('. ')
-                for sentence in sentences:
-                    sent_tokens = self.count_tokens(sentence)
-                    if current_tokens + sent_tokens > self.chunk_size:
-                        if current_chunk:
-                            chunks.append({
-                                'content': current_chunk.strip(),
-                                'metadata': metadata or {}
-                            })
+                for sentence, sent_tokens in zip(sentences, self.count_tokens_batch(sentences)):
+                    joined_tokens = current_tokens + self._sentence_sep_tokens + sent_tokens
+                    if current_chunk and joined_tokens > self.chunk_size:
+                        yield current_chunk.strip()
                         current_chunk = sentence
                         current_tokens = sent_tokens
+                    elif current_chunk:
+                        current_chunk += " " + sentence
+                        current_tokens = joined_tokens
                     else:
-                        current_chunk += " " + sentence if current_chunk else sentence
-                        current_tokens += sent_tokens
+                        current_chunk = sentence
+                        current_tokens = sent_tokens
             else:
                 # Check if adding this paragraph would exceed chunk size
-                if current_tokens + para_tokens > self.chunk_size:
-                    if current_chunk:
-                        chunks.append({
-                            'content': current_chunk.strip(),
-                            'metadata': metadata or {}
-                        })
+                joined_tokens = current_tokens + self._paragraph_sep_tokens + para_tokens
+                if current_chunk and joined_tokens > self.chunk_size:
+                    yield current_chunk.strip()
                     current_chunk = paragraph
                     current_tokens = para_tokens
+                elif current_chunk:
+                    current_chunk += "\n\n" + paragraph
+                    current_tokens = joined_tokens
                 else:
-                    current_chunk += "\n\n" + paragraph if current_chunk else paragraph
-                    current_tokens += para_tokens
+                    current_chunk = paragraph
+                    current_tokens = para_tokens
         
         # Add final chunk
         if current_chunk:
-            chunks.append({
-                'content': current_chunk.strip(),
-                'metadata': metadata or {}
-            })
-        
-        # Ensure chunks are within token limits (200-500)
-        final_chunks = []
-        for chunk in chunks:
-            tokens = self.count_tokens(chunk['content'])
-            if tokens < 200:
-                # Merge with next chunk if possible
-                if final_chunks:
-                    last_chunk = final_chunks[-1]
-                    combined = last_chunk['content'] + "\n\n" + chunk['content']
-                    if self.count_tokens(combined) <= 500:
-                        final_chunks[-1]['content'] = combined
-                        continue
-            elif tokens > 500:
-                # Split further
-                sub_chunks = self._split_large_chunk(chunk['content'], chunk['metadata'])
-                final_chunks.extend(sub_chunks)
-            else:
-                final_chunks.append(chunk)
-        
-        logger.info(f"Created {len(final_chunks)} chunks from text")
-        return final_chunks
+            yield current_chunk.strip()
     
     def _split_large_chunk(self, text: str, metadata: dict) -> list:
-        """Split a chunk that's too large into smaller pieces"""
+        """Split a chunk that's too large into smaller pieces, returning (chunk, token_count) pairs"""
         sentences = text.split('. ')
         chunks = []
         current_chunk = ""
+        current_tokens = 0
         
-        for sentence in sentences:
-            if self.count_tokens(current_chunk + sentence) > 500:
-                if current_chunk:
-                    chunks.append({
-                        'content': current_chunk.strip(),
-                        'metadata': metadata
-                    })
+        for sentence, sent_tokens in zip(sentences, self.count_tokens_batch(sentences)):
+            joined_tokens = current_tokens + self._split_sep_tokens + sent_tokens
+            if current_chunk and joined_tokens > 500:
+                chunks.append(({
+                    'content': current_chunk.strip(),
+                    'metadata': metadata
+                }, current_tokens))
                 current_chunk = sentence
+                current_tokens = sent_tokens
+            elif current_chunk:
+                current_chunk += ". " + sentence
+                current_tokens = joined_tokens
             else:
-                current_chunk += ". " + sentence if current_chunk else sentence
+                current_chunk = sentence
+                current_tokens = sent_tokens
         
         if current_chunk:
-            chunks.append({
+            chunks.append(({
                 'content': current_chunk.strip(),
                 'metadata': metadata
-            })
+            }, current_tokens))
         
         return chunks
-
@@ -1,51 +1,68 @@
 """
 Document processing for various file formats
 """
+import importlib
+import io
+import multiprocessing
 import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
 from pathlib import Path
-from typing import List, Dict
+from functools import lru_cache
+from typing import BinaryIO, Iterable, Iterator, List, Dict, Union
 import logging
 
-# PDF processing
-try:
-    import PyPDF2
-    PDF_AVAILABLE = True
-except ImportError:
-    PDF_AVAILABLE = False
-
-# DOCX processing
-try:
-    from docx import Document
-    DOCX_AVAILABLE = True
-except ImportError:
-    DOCX_AVAILABLE = False
-
-# PPTX processing
-try:
-    from pptx import Presentation
-    PPTX_AVAILABLE = True
-except ImportError:
-    PPTX_AVAILABLE = False
-
-# Image OCR
-try:
-    from PIL import Image
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
-
 from config import Config
 from .chunking import TextChunker
 
 logger = logging.getLogger(__name__)
 
+# Extractors accept either a path on disk or an open binary stream
+FileSource = Union[Path, BinaryIO]
+
+# PDFium is not thread-safe, and admin sessions parse uploads on separate
+# threads of one process, so every in-process PDFium call is serialized
+_PDFIUM_LOCK = threading.Lock()
+
+# Parse workers are spawned rather than forked: they are started from
+# multi-threaded callers, and a forked child would inherit locks (such as
+# _PDFIUM_LOCK) or tokenizer/gRPC state that another thread held at fork time
+WORKER_CONTEXT = multiprocessing.get_context("spawn")
+
+
+@lru_cache(maxsize=None)
+def _optional_import(module_name: str):
+    """
+    Import an optional parser dependency on first use; None if it is not installed
+
+    Parsers are imported lazily so pages that never see a given format (e.g.
+    OCR for text-only uploads) don't pay for its import time and memory.
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError:
+        return None
+
+
+def _extract_pdf_page_range(path: str, start: int, stop: int) -> List[str]:
+    """Extract text of pages [start, stop) of a PDF inside a worker process"""
+    pdf = _optional_import("pypdfium2").PdfDocument(path)
+    try:
+        return [pdf[i].get_textpage().get_text_range() for i in range(start, stop)]
+    finally:
+        pdf.close()
+
+
 class DocumentProcessor:
     """Processes various document formats and extracts text"""
     
-    def __init__(self):
+    def __init__(self, parallel_pdf_pages: bool = True):
         self.chunker = TextChunker()
         self.supported_formats = Config.SUPPORTED_FORMATS
+        # Split large PDFs across processes (off inside pool workers, which
+        # already run one file per core)
+        self.parallel_pdf_pages = parallel_pdf_pages
     
     def process_file(self, file_path: str, metadata: Dict = None) -> List[Dict]:
         """
@@ -58,106 +75,238 @@ class DocumentProcessor:
         Returns:
             List of chunk dictionaries
         """
+        chunks = list(self.iter_chunks(file_path, metadata))
+        logger.info(f"Processed {Path(file_path).name}: {len(chunks)} chunks created")
+        return chunks
+    
+    def iter_chunks(self, file_path: str, metadata: Dict = None) -> Iterator[Dict]:
+        """
+        Return an iterator over a file's chunks, produced as its text is extracted
+        
+        Missing files and unsupported formats raise here; parse errors further
+        into the document surface while iterating.
+        """
         file_path = Path(file_path)
         
         if not file_path.exists():
             raise FileNotFoundError(f"File not found: {file_path}")
         
         file_ext = file_path.suffix.lower()
+        text = self._extract_text(file_path, file_ext)
+        file_metadata = self._file_metadata(file_path.name, str(file_path), file_ext, metadata)
+        return self.chunker.iter_chunks(text, file_metadata)
+    
+    def process_bytes(self, data: bytes, filename: str, metadata: Dict = None) -> List[Dict]:
+        """
+        Process an in-memory file and return chunks with metadata
+        
+        Args:
+            data: Raw file contents
+            filename: Original file name; its extension selects the parser
+            metadata: Additional metadata (module, chapter, lesson, concept)
+            
+        Returns:
+            List of chunk dictionaries
+        """
+        file_ext = Path(filename).suffix.lower()
+        text = self._extract_text(io.BytesIO(data), file_ext)
+        return self._chunk(text, filename, filename, file_ext, metadata)
+    
+    def _extract_text(self, source: FileSource, file_ext: str) -> Union[str, Iterable[str]]:
+        """
+        Extract text from a path or binary stream based on file type
         
+        Paged formats yield their text lazily (per page, paragraph or slide)
+        so the chunker consumes it without the whole document held twice.
+        """
         if file_ext not in self.supported_formats:
             raise ValueError(f"Unsupported file format: {file_ext}")
         
-        # Extract text based on file type
         if file_ext == ".pdf":
-            text = self._extract_pdf(file_path)
+            return self._extract_pdf(source)
         elif file_ext == ".docx":
-            text = self._extract_docx(file_path)
+            return self._extract_docx(source)
         elif file_ext == ".pptx":
-            text = self._extract_pptx(file_path)
+            return self._extract_pptx(source)
         elif file_ext in [".png", ".jpg", ".jpeg"]:
-            text = self._extract_image_ocr(file_path)
+            return self._extract_image_ocr(source)
         else:
             raise ValueError(f"Unsupported file format: {file_ext}")
-        
-        # Prepare metadata
-        file_metadata = {
-            "source_file": str(file_path.name),
-            "file_path": str(file_path),
+    
+    @staticmethod
+    def _file_metadata(file_name: str, file_path: str, file_ext: str, metadata: Dict = None) -> Dict:
+        """Metadata attached to every chunk of a file"""
+        return {
+            "source_file": file_name,
+            "file_path": file_path,
             "file_type": file_ext,
             **(metadata or {})
         }
-        
-        # Chunk the text
+    
+    def _chunk(
+        self, text: Union[str, Iterable[str]], file_name: str, file_path: str, file_ext: str, metadata: Dict = None
+    ) -> List[Dict]:
+        """Chunk extracted text, attaching file metadata to every chunk"""
+        file_metadata = self._file_metadata(file_name, file_path, file_ext, metadata)
         chunks = self.chunker.chunk_text(text, file_metadata)
         
-        logger.info(f"Processed {file_path.name}: {len(chunks)} chunks created")
+        logger.info(f"Processed {file_name}: {len(chunks)} chunks created")
         return chunks
     
-    def _extract_pdf(self, file_path: Path) -> str:
-        """Extract text from PDF file"""
-        if not PDF_AVAILABLE:
-            raise ImportError("PyPDF2 is required for PDF processing")
+    def _extract_pdf(self, source: FileSource) -> Iterator[str]:
+        """Extract text from PDF file, one page at a time"""
+        # pypdfium2 preferred: native PDFium text extraction
+        pdfium = _optional_import("pypdfium2")
+        if pdfium is not None:
+            return self._extract_pdf_pdfium(pdfium, source)
+        PyPDF2 = _optional_import("PyPDF2")
+        if PyPDF2 is None:
+            raise ImportError("pypdfium2 or PyPDF2 is required for PDF processing")
         
-        text_content = []
         try:
-            with open(file_path, 'rb') as file:
-                pdf_reader = PyPDF2.PdfReader(file)
-                for page_num, page in enumerate(pdf_reader.pages):
-                    text = page.extract_text()
-                    if text.strip():
-                        text_content.append(text)
+            pdf_reader = PyPDF2.PdfReader(source)
+        except Exception as e:
+            logger.error(f"Error extracting PDF {source}: {str(e)}")
+            raise
+        return self._iter_pdf_pages(pdf_reader, source)
+    
+    @staticmethod
+    def _iter_pdf_pages(pdf_reader, source: FileSource) -> Iterator[str]:
+        try:
+            for page in pdf_reader.pages:
+                text = page.extract_text()
+                if text.strip():
+                    yield text
+        except Exception as e:
+            logger.error(f"Error extracting PDF {source}: {str(e)}")
+            raise
+    
+    def _extract_pdf_pdfium(self, pdfium, source: FileSource) -> Iterator[str]:
+        """Extract text from PDF file with pypdfium2, one page at a time"""
+        try:
+            with _PDFIUM_LOCK:
+                pdf = pdfium.PdfDocument(str(source) if isinstance(source, Path) else source)
+                page_count = len(pdf)
         except Exception as e:
-            logger.error(f"Error extracting PDF {file_path}: {str(e)}")
+            logger.error(f"Error extracting PDF {source}: {str(e)}")
             raise
         
-        return "\n\n".join(text_content)
+        workers = min(Config.INGEST_WORKERS, page_count // Config.PDF_PARALLEL_MIN_PAGES)
+        if self.parallel_pdf_pages and isinstance(source, Path) and workers > 1:
+            with _PDFIUM_LOCK:
+                pdf.close()
+            return self._iter_pdfium_pages_parallel(str(source), page_count, workers)
+        return self._iter_pdfium_pages(pdf, page_count, source)
+    
+    @staticmethod
+    def _iter_pdfium_pages_parallel(path: str, page_count: int, workers: int) -> Iterator[str]:
+        # PDFium is not thread-safe, so pages are split across processes that
+        # each open the file; map keeps the page order
+        step = -(-page_count // (workers * 4))
+        starts = range(0, page_count, step)
+        stops = [min(start + step, page_count) for start in starts]
+        try:
+            with ProcessPoolExecutor(max_workers=workers, mp_context=WORKER_CONTEXT) as pool:
+                for texts in pool.map(_extract_pdf_page_range, repeat(path), starts, stops):
+                    for text in texts:
+                        if text.strip():
+                            yield text
+        except Exception as e:
+            logger.error(f"Error extracting PDF {path}: {str(e)}")
+            raise
     
-    def _extract_docx(self, file_path: Path) -> str:
-        """Extract text from DOCX file"""
-        if not DOCX_AVAILABLE:
+    @staticmethod
+    def _iter_pdfium_pages(pdf, page_count: int, source: FileSource) -> Iterator[str]:
+        # The lock is taken per page rather than across yields, so concurrent
+        # files interleave; pages are closed explicitly so PDFium objects are
+        # never released by a garbage-collector finalizer outside the lock
+        try:
+            for index in range(page_count):
+                with _PDFIUM_LOCK:
+                    page = pdf[index]
+                    textpage = page.get_textpage()
+                    text = textpage.get_text_range()
+                    textpage.close()
+                    page.close()
+                if text.strip():
+                    yield text
+        except Exception as e:
+            logger.error(f"Error extracting PDF {source}: {str(e)}")
+            raise
+        finally:
+            with _PDFIUM_LOCK:
+                pdf.close()
+    
+    def _extract_docx(self, source: FileSource) -> Iterator[str]:
+        """Extract text from DOCX file, one paragraph at a time"""
+        docx = _optional_import("docx")
+        if docx is None:
             raise ImportError("python-docx is required for DOCX processing")
         
         try:
-            doc = Document(file_path)
-            paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
-            return "\n\n".join(paragraphs)
+            doc = docx.Document(source)
         except Exception as e:
-            logger.error(f"Error extracting DOCX {file_path}: {str(e)}")
+            logger.error(f"Error extracting DOCX {source}: {str(e)}")
             raise
+        return (para.text for para in doc.paragraphs if para.text.strip())
     
-    def _extract_pptx(self, file_path: Path) -> str:
-        """Extract text from PPTX file"""
-        if not PPTX_AVAILABLE:
+    def _extract_pptx(self, source: FileSource) -> Iterator[str]:
+        """Extract text from PPTX file, one slide at a time"""
+        pptx = _optional_import("pptx")
+        if pptx is None:
             raise ImportError("python-pptx is required for PPTX processing")
         
         try:
-            prs = Presentation(file_path)
-            text_content = []
-            
+            prs = pptx.Presentation(source)
+        except Exception as e:
+            logger.error(f"Error extracting PPTX {source}: {str(e)}")
+            raise
+        return self._iter_pptx_slides(prs, source)
+    
+    @staticmethod
+    def _iter_pptx_slides(prs, source: FileSource) -> Iterator[str]:
+        try:
             for slide_num, slide in enumerate(prs.slides):
                 slide_text = []
                 for shape in slide.shapes:
                     if hasattr(shape, "text") and shape.text.strip():
                         slide_text.append(shape.text)
                 if slide_text:
-                    text_content.append(f"Slide {slide_num + 1}:\n" + "\n".join(slide_text))
-            
-            return "\n\n".join(text_content)
+                    yield f"Slide {slide_num + 1}:\n" + "\n".join(slide_text)
         except Exception as e:
-            logger.error(f"Error extracting PPTX {file_path}: {str(e)}")
+            logger.error(f"Error extracting PPTX {source}: {str(e)}")
             raise
     
-    def _extract_image_ocr(self, file_path: Path) -> str:
+    def _extract_image_ocr(self, source: FileSource) -> str:
         """Extract text from image using OCR"""
-        if not OCR_AVAILABLE:
+        Image = _optional_import("PIL.Image")
+        pytesseract = _optional_import("pytesseract")
+        if Image is None or pytesseract is None:
             raise ImportError("Pillow and pytesseract are required for OCR")
         
         try:
-            image = Image.open(file_path)
+            image = Image.open(source)
             text = pytesseract.image_to_string(image)
             return text
         except Exception as e:
-            logger.error(f"Error extracting text from image {file_path}: {str(e)}")
+            logger.error(f"Error extracting text from image {source}: {str(e)}")
             raise
 
+
+# Per-process DocumentProcessor reused by process_file_in_worker
+_worker_processor = None
+
+
+def process_file_in_worker(file_path: str, metadata: Dict = None) -> List[Dict]:
+    """
+    Parse and chunk a file inside a worker process
+    
+    Module-level so it can be submitted to a ProcessPoolExecutor; PDF parsing
+    and OCR are CPU-bound, so processes rather than threads give real
+    parallelism. Each worker builds its DocumentProcessor once.
+    """
+    global _worker_processor
+    if _worker_processor is None:
+        _worker_processor = DocumentProcessor(parallel_pdf_pages=False)
+    logger.info(f"Processing file: {Path(file_path).name}")
+    return _worker_processor.process_file(file_path, metadata)
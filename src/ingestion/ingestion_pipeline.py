@@ -1,25 +1,117 @@
 """
 Main ingestion pipeline that orchestrates document processing, chunking, and embedding storage
 """
+import asyncio
+import hashlib
 import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import nullcontext
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterator, Optional, Callable, Tuple
 import logging
 from datetime import datetime
+from itertools import islice
 
+import numpy as np
+from cachetools import LRUCache
+
+from config import Config
 from ..database.supabase_client import SupabaseClient
 from ..embeddings.embedding_service import EmbeddingService
-from .document_processor import DocumentProcessor
+from .document_processor import WORKER_CONTEXT, DocumentProcessor, process_file_in_worker
 
 logger = logging.getLogger(__name__)
 
+# Minimum seconds between progress log lines while a file is being stored
+PROGRESS_LOG_INTERVAL = 2.0
+
+
+SUPPORTED_EXTENSIONS = frozenset(Config.SUPPORTED_FORMATS)
+
+
+def _scandir_recursive(
+    path: str,
+    extensions: frozenset = SUPPORTED_EXTENSIONS,
+    include_hidden: bool = False,
+) -> Iterator[os.DirEntry]:
+    """
+    Yield DirEntry objects for files under ``path`` with a supported extension.
+
+    Uses os.scandir so file type checks reuse the cached directory entry data
+    instead of issuing extra stat() calls per file. Unsupported files are
+    rejected by name before any type check, and dotfiles/dot-directories are
+    skipped unless ``include_hidden`` is set. Subdirectories go on an
+    explicit stack, so deep trees neither nest generators per level nor hit
+    the recursion limit.
+    """
+    pending = [path]
+    while pending:
+        with os.scandir(pending.pop()) as it:
+            for entry in it:
+                name = entry.name
+                if not include_hidden and name.startswith("."):
+                    continue
+                if os.path.splitext(name)[1].lower() in extensions and entry.is_file():
+                    yield entry
+                elif entry.is_dir(follow_symlinks=False):
+                    pending.append(entry.path)
+
+
+def _bytes_digest(data: bytes) -> str:
+    """BLAKE2b hash of in-memory file contents, matching _file_digest."""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def _content_hash(text: str) -> str:
+    """SHA-256 hex digest of a chunk's text (embedding_cache key)."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def _file_digest(file_path: Path) -> str:
+    """BLAKE2b hash of a file's contents, read in 1 MiB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _ProgressLog:
+    """Logs a file's storage progress at most once per PROGRESS_LOG_INTERVAL seconds"""
+    
+    def __init__(self, file_name: str):
+        self.file_name = file_name
+        self._last_log = time.monotonic()
+    
+    def update(self, stored: int, seen: int):
+        if not logger.isEnabledFor(logging.INFO):
+            return
+        now = time.monotonic()
+        if now - self._last_log >= PROGRESS_LOG_INTERVAL:
+            self._last_log = now
+            logger.info(f"{self.file_name}: {stored}/{seen} chunks stored so far")
+
+
 class IngestionPipeline:
     """Main pipeline for ingesting course materials"""
     
+    # Max (file_hash, version) pairs remembered in-process to skip the DB lookup
+    INGESTED_CACHE_SIZE = 4096
+    
     def __init__(self):
         self.db_client = SupabaseClient()
         self.embedding_service = EmbeddingService()
         self.doc_processor = DocumentProcessor()
+        self._ingested_files = OrderedDict()
+        self._ingested_lock = threading.Lock()
+        # (content hash, model) -> embedding; repeats across batches and files skip the DB cache
+        self._chunk_embeddings = LRUCache(maxsize=Config.CHUNK_EMBEDDING_CACHE_SIZE)
+        self._chunk_embeddings_lock = threading.Lock()
+        # Set when a bulk load dropped the vector index and could not rebuild it
+        self.vector_index_missing = False
         logger.info("Ingestion pipeline initialized")
     
     def ingest_file(
@@ -47,87 +139,497 @@ class IngestionPipeline:
         """
         file_path = Path(file_path)
         start_time = datetime.now()
+        metadata = self._build_metadata(module, chapter, lesson, concept, version)
         
         try:
-            # Prepare metadata
-            metadata = {
-                "module": module or "",
-                "chapter": chapter or "",
-                "lesson": lesson or "",
-                "concept": concept or "",
-                "version": version,
-                "ingested_at": datetime.now().isoformat()
-            }
+            # Skip files whose exact content was already ingested at this version
+            file_hash, skipped_result = self._check_already_ingested(file_path, version)
+            if skipped_result:
+                return skipped_result
+            metadata["file_hash"] = file_hash
+            
+            # Chunks are produced lazily and embedded/stored batch by batch
+            logger.info(f"Processing file: {file_path.name}")
+            chunks = self.doc_processor.iter_chunks(str(file_path), metadata)
+        except Exception as e:
+            return self._failure_result(file_path, e)
+        
+        return self._store_chunk_stream(file_path, chunks, metadata, start_time)
+    
+    def ingest_bytes(
+        self,
+        data: bytes,
+        filename: str,
+        module: str = None,
+        chapter: str = None,
+        lesson: str = None,
+        concept: str = None,
+        version: int = 1
+    ) -> Dict:
+        """
+        Ingest an in-memory file (e.g. a small upload) without writing it to disk
+        
+        Args:
+            data: Raw file contents
+            filename: Original file name; its extension selects the parser
+            module, chapter, lesson, concept, version: As for ingest_file
             
+        Returns:
+            Dictionary with ingestion results
+        """
+        file_path = Path(filename)
+        start_time = datetime.now()
+        metadata = self._build_metadata(module, chapter, lesson, concept, version)
+        
+        try:
+            file_hash, skipped_result = self._check_already_ingested(
+                file_path, version, file_hash=_bytes_digest(data)
+            )
+            if skipped_result:
+                return skipped_result
+            metadata["file_hash"] = file_hash
+            
+            logger.info(f"Processing in-memory file: {file_path.name}")
+            chunks = self.doc_processor.process_bytes(data, file_path.name, metadata)
+        except Exception as e:
+            return self._failure_result(file_path, e)
+        
+        return self._store_chunks(file_path, chunks, metadata, start_time)
+    
+    def _check_already_ingested(
+        self, file_path: Path, version: int, file_hash: str = None
+    ) -> Tuple[str, Optional[Dict]]:
+        """
+        Hash a file and look for an earlier ingestion of the same content at this version.
+        
+        Returns:
+            The file hash, and a result dict to report if the file should be skipped
+        """
+        file_hash = file_hash or _file_digest(file_path)
+        key = (file_hash, version)
+        with self._ingested_lock:
+            already_ingested = key in self._ingested_files
+        
+        if not already_ingested:
+            try:
+                already_ingested = self.db_client.has_file_hash(file_hash, version)
+            except Exception as e:
+                logger.warning(f"Could not check previous ingestion of {file_path.name}: {str(e)}")
+            if already_ingested:
+                self._remember_ingested(file_hash, version)
+        
+        if not already_ingested:
+            return file_hash, None
+        
+        logger.info(f"Skipping {file_path.name}: identical content already ingested at version {version}")
+        return file_hash, {
+            "success": True,
+            "skipped": True,
+            "file_name": file_path.name,
+            "message": f"Identical content already ingested at version {version}",
+            "chunks_created": 0
+        }
+    
+    def _remember_ingested(self, file_hash: str, version: int):
+        with self._ingested_lock:
+            self._ingested_files[(file_hash, version)] = True
+            self._ingested_files.move_to_end((file_hash, version))
+            while len(self._ingested_files) > self.INGESTED_CACHE_SIZE:
+                self._ingested_files.popitem(last=False)
+    
+    @staticmethod
+    def _build_metadata(
+        module: str = None,
+        chapter: str = None,
+        lesson: str = None,
+        concept: str = None,
+        version: int = 1
+    ) -> Dict:
+        return {
+            "module": module or "",
+            "chapter": chapter or "",
+            "lesson": lesson or "",
+            "concept": concept or "",
+            "version": version,
+            "ingested_at": datetime.now().isoformat()
+        }
+    
+    @staticmethod
+    def _failure_result(file_path: Path, error: Exception) -> Dict:
+        logger.error(f"Error ingesting file {file_path}: {str(error)}")
+        return {
+            "success": False,
+            "file_name": file_path.name,
+            "error": str(error),
+            "chunks_created": 0
+        }
+    
+    def _store_chunks(
+        self,
+        file_path: Path,
+        chunks: List[Dict],
+        metadata: Dict,
+        start_time: datetime
+    ) -> Dict:
+        """Embed already-processed chunks of a file and store them in the database"""
+        try:
             # Delete existing chunks for this file (if re-indexing)
-            if version > 1:
+            if metadata["version"] > 1:
                 self.db_client.delete_by_source(file_path.name)
             
-            # Process document and create chunks
-            logger.info(f"Processing file: {file_path.name}")
-            chunks = self.doc_processor.process_file(str(file_path), metadata)
-            
             if not chunks:
-                logger.warning(f"No chunks created from {file_path.name}")
-                return {
-                    "success": False,
-                    "message": "No content extracted from file",
-                    "chunks_created": 0
-                }
+                return self._no_chunks_result(file_path)
             
-            # Generate embeddings and store
-            logger.info(f"Generating embeddings for {len(chunks)} chunks...")
+            # Generate embeddings in batches, then store
             chunks_stored = 0
             errors = []
+            embeddings = self._embed_chunks([chunk['content'] for chunk in chunks], errors)
+            records = self._build_records(chunks, embeddings, metadata)
+            
+            try:
+                # Store all chunks of the file with COPY or batched multi-row inserts
+                chunks_stored = self._store_records(records, errors)
+            except Exception as e:
+                error_msg = f"Error storing chunks: {str(e)}"
+                logger.error(error_msg)
+                errors.append(error_msg)
+            
+            return self._stored_result(file_path, chunks_stored, len(chunks), errors, metadata, start_time)
+            
+        except Exception as e:
+            return self._failure_result(file_path, e)
+    
+    def _store_chunk_stream(
+        self,
+        file_path: Path,
+        chunks: Iterator[Dict],
+        metadata: Dict,
+        start_time: datetime
+    ) -> Dict:
+        """
+        Embed and store a file's chunks in batches as the document is parsed
+        
+        A single background thread parses the next Config.STREAM_CHUNK_BATCH_SIZE
+        chunks while the current batch is embedded and stored, so only two
+        batches are held in memory. If parsing fails partway, or some chunks
+        cannot be embedded or stored, rows already stored are removed so a
+        retry is not skipped as already ingested.
+        """
+        batch_size = Config.STREAM_CHUNK_BATCH_SIZE
+        total_chunks = 0
+        chunks_stored = 0
+        errors = []
+        progress = _ProgressLog(file_path.name)
+        try:
+            # Delete existing chunks for this file (if re-indexing)
+            if metadata["version"] > 1:
+                self.db_client.delete_by_source(file_path.name)
+            
+            # One thread owns the parser (PDFium must not be used concurrently)
+            with ThreadPoolExecutor(max_workers=1) as parser:
+                upcoming = parser.submit(lambda: list(islice(chunks, batch_size)))
+                while batch := upcoming.result():
+                    upcoming = parser.submit(lambda: list(islice(chunks, batch_size)))
+                    total_chunks += len(batch)
+                    embeddings = self._embed_chunks([chunk['content'] for chunk in batch], errors)
+                    records = self._build_records(batch, embeddings, metadata)
+                    try:
+                        chunks_stored += self._store_records(records, errors)
+                    except Exception as e:
+                        error_msg = f"Error storing chunks: {str(e)}"
+                        logger.error(error_msg)
+                        errors.append(error_msg)
+                    progress.update(chunks_stored, total_chunks)
+        except Exception as e:
+            if chunks_stored:
+                self._discard_partial_ingest(file_path, metadata)
+            return self._failure_result(file_path, e)
+        
+        if not total_chunks:
+            return self._no_chunks_result(file_path)
+        return self._stored_result(file_path, chunks_stored, total_chunks, errors, metadata, start_time)
+    
+    def _discard_partial_ingest(self, file_path: Path, metadata: Dict):
+        """Remove rows of an ingestion that failed partway, so the file can be retried"""
+        try:
+            self.db_client.delete_by_file_hash(metadata["file_hash"], metadata["version"])
+        except Exception as e:
+            logger.warning(f"Could not remove partially ingested chunks of {file_path.name}: {str(e)}")
+    
+    async def ingest_file_async(
+        self,
+        file_path: str,
+        module: str = None,
+        chapter: str = None,
+        lesson: str = None,
+        concept: str = None,
+        version: int = 1
+    ) -> Dict:
+        """
+        Ingest a single file with embedding and storage overlapped
+        
+        Chunk batches flow through bounded queues as the document is parsed:
+        up to Config.EMBED_CONCURRENCY batches are embedded at once while an
+        inserter stores finished batches in groups of
+        Config.SUPABASE_INSERT_BATCH_SIZE. Blocking client calls
+        run in worker threads via asyncio.to_thread.
+        
+        Args and return value are the same as ingest_file.
+        """
+        file_path = Path(file_path)
+        start_time = datetime.now()
+        metadata = self._build_metadata(module, chapter, lesson, concept, version)
+        
+        try:
+            file_hash, skipped_result = await asyncio.to_thread(
+                self._check_already_ingested, file_path, version
+            )
+            if skipped_result:
+                return skipped_result
+            metadata["file_hash"] = file_hash
+            
+            logger.info(f"Processing file: {file_path.name}")
+            chunks = await asyncio.to_thread(self.doc_processor.iter_chunks, str(file_path), metadata)
             
-            for i, chunk in enumerate(chunks):
+            # Delete existing chunks for this file (if re-indexing)
+            if metadata["version"] > 1:
+                await asyncio.to_thread(self.db_client.delete_by_source, file_path.name)
+        except Exception as e:
+            return self._failure_result(file_path, e)
+        
+        concurrency = Config.EMBED_CONCURRENCY
+        embed_queue = asyncio.Queue(maxsize=concurrency)
+        insert_queue = asyncio.Queue(maxsize=concurrency)
+        errors = []
+        chunks_stored = 0
+        total_chunks = 0
+        parse_error = None
+        progress = _ProgressLog(file_path.name)
+        
+        async def extractor():
+            nonlocal total_chunks, parse_error
+            batch_size = Config.EMBEDDING_BATCH_SIZE
+            try:
+                # Parse lazily, one batch at a time, as the embedders drain the queue
+                while batch := await asyncio.to_thread(lambda: list(islice(chunks, batch_size))):
+                    total_chunks += len(batch)
+                    await embed_queue.put(batch)
+            except Exception as e:
+                parse_error = e
+            finally:
+                for _ in range(concurrency):
+                    await embed_queue.put(None)
+        
+        async def embedder():
+            while (batch := await embed_queue.get()) is not None:
                 try:
-                    # Generate embedding
-                    embedding = self.embedding_service.generate_embedding(chunk['content'])
-                    
-                    # Store in database
-                    self.db_client.insert_embedding(
-                        content=chunk['content'],
-                        embedding=embedding,
-                        metadata={**chunk['metadata'], **metadata}
+                    embeddings = await asyncio.to_thread(
+                        self._embed_chunks, [chunk['content'] for chunk in batch], errors
                     )
-                    chunks_stored += 1
-                    
-                    if (i + 1) % 10 == 0:
-                        logger.info(f"Processed {i + 1}/{len(chunks)} chunks...")
-                        
                 except Exception as e:
-                    error_msg = f"Error processing chunk {i + 1}: {str(e)}"
+                    error_msg = f"Error embedding {len(batch)} chunks: {str(e)}"
                     logger.error(error_msg)
                     errors.append(error_msg)
+                    continue
+                await insert_queue.put(self._build_records(batch, embeddings, metadata))
+        
+        async def inserter():
+            nonlocal chunks_stored
+            pending = []
             
-            duration = (datetime.now() - start_time).total_seconds()
-            
-            result = {
-                "success": True,
-                "file_name": file_path.name,
-                "chunks_created": chunks_stored,
-                "total_chunks": len(chunks),
-                "errors": errors,
-                "duration_seconds": duration,
-                "metadata": metadata
-            }
+            async def flush():
+                nonlocal chunks_stored
+                records = pending[:]
+                pending.clear()
+                try:
+                    chunks_stored += await asyncio.to_thread(self._store_records, records, errors)
+                except Exception as e:
+                    error_msg = f"Error storing {len(records)} chunks: {str(e)}"
+                    logger.error(error_msg)
+                    errors.append(error_msg)
+                progress.update(chunks_stored, total_chunks)
             
-            logger.info(
-                f"Ingestion complete: {file_path.name} - "
-                f"{chunks_stored}/{len(chunks)} chunks stored in {duration:.2f}s"
+            while (records := await insert_queue.get()) is not None:
+                pending.extend(records)
+                if len(pending) >= Config.SUPABASE_INSERT_BATCH_SIZE:
+                    await flush()
+            if pending:
+                await flush()
+        
+        insert_task = asyncio.create_task(inserter())
+        await asyncio.gather(extractor(), *(embedder() for _ in range(concurrency)))
+        await insert_queue.put(None)
+        await insert_task
+        
+        if parse_error is not None:
+            if chunks_stored:
+                await asyncio.to_thread(self._discard_partial_ingest, file_path, metadata)
+            return self._failure_result(file_path, parse_error)
+        if not total_chunks:
+            return self._no_chunks_result(file_path)
+        # May delete the rows of an incomplete ingest, so keep it off the event loop
+        return await asyncio.to_thread(
+            self._stored_result, file_path, chunks_stored, total_chunks, errors, metadata, start_time
+        )
+    
+    def _store_records(self, records: List[Dict], errors: List[str]) -> int:
+        """Store records, noting in ``errors`` any rows the database rejected"""
+        stored = self.db_client.bulk_copy_embeddings(records)
+        if stored < len(records):
+            error_msg = f"Could not store {len(records) - stored} of {len(records)} chunks"
+            logger.error(error_msg)
+            errors.append(error_msg)
+        return stored
+    
+    @staticmethod
+    def _build_records(chunks: List[Dict], embeddings: List[Optional[np.ndarray]], metadata: Dict) -> List[Dict]:
+        # Chunks of a file share one metadata dict, so merge once per distinct
+        # dict rather than once per chunk; records only read the result.
+        # Chunks whose embedding failed (None) are left out
+        merged = {}
+        records = []
+        for chunk, embedding in zip(chunks, embeddings):
+            if embedding is None:
+                continue
+            chunk_metadata = chunk['metadata']
+            record_metadata = merged.get(id(chunk_metadata))
+            if record_metadata is None:
+                record_metadata = merged[id(chunk_metadata)] = {**chunk_metadata, **metadata}
+            records.append({"content": chunk['content'], "embedding": embedding, "metadata": record_metadata})
+        return records
+    
+    @staticmethod
+    def _no_chunks_result(file_path: Path) -> Dict:
+        logger.warning(f"No chunks created from {file_path.name}")
+        return {
+            "success": False,
+            "message": "No content extracted from file",
+            "chunks_created": 0
+        }
+    
+    def _stored_result(
+        self,
+        file_path: Path,
+        chunks_stored: int,
+        total_chunks: int,
+        errors: List[str],
+        metadata: Dict,
+        start_time: datetime
+    ) -> Dict:
+        if chunks_stored < total_chunks:
+            return self._incomplete_result(file_path, chunks_stored, total_chunks, errors, metadata)
+        if metadata.get("file_hash"):
+            self._remember_ingested(metadata["file_hash"], metadata["version"])
+        
+        duration = (datetime.now() - start_time).total_seconds()
+        
+        result = {
+            "success": True,
+            "file_name": file_path.name,
+            "chunks_created": chunks_stored,
+            "total_chunks": total_chunks,
+            "errors": errors,
+            "duration_seconds": duration,
+            "metadata": metadata
+        }
+        
+        logger.info(
+            f"Ingestion complete: {file_path.name} - "
+            f"{chunks_stored}/{total_chunks} chunks stored in {duration:.2f}s"
+        )
+        
+        return result
+    
+    def _incomplete_result(
+        self,
+        file_path: Path,
+        chunks_stored: int,
+        total_chunks: int,
+        errors: List[str],
+        metadata: Dict
+    ) -> Dict:
+        """
+        Report a file whose chunks were not all embedded and stored
+        
+        Stored rows carry the file hash, so they are removed again; otherwise
+        a retry of the same file would be skipped as already ingested and the
+        missing chunks could never be added.
+        """
+        if chunks_stored and metadata.get("file_hash"):
+            self._discard_partial_ingest(file_path, metadata)
+        error_msg = f"Stored only {chunks_stored} of {total_chunks} chunks; upload the file again to retry"
+        logger.error(f"{file_path.name}: {error_msg}")
+        return {
+            "success": False,
+            "file_name": file_path.name,
+            "error": error_msg,
+            "chunks_created": 0,
+            "total_chunks": total_chunks,
+            "errors": errors
+        }
+    
+    def _embed_chunks(self, texts: List[str], errors: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Embed chunk texts, calling the embedding API once per distinct text
+        
+        Repeated chunks (headers, footers, boilerplate) are embedded once and
+        texts found in the embedding cache for the current model (including
+        unchanged chunks of a re-indexed file) reuse the cached embedding.
+        Recently seen texts are answered from memory before the database
+        cache is queried. Texts that cannot be embedded come back as None,
+        with a message appended to ``errors``.
+        """
+        hashes = [_content_hash(text) for text in texts]
+        unique_texts = {}
+        for content_hash, text in zip(hashes, texts):
+            unique_texts.setdefault(content_hash, text)
+        
+        model = self.embedding_service.model_name
+        known = {}
+        with self._chunk_embeddings_lock:
+            for content_hash in unique_texts:
+                embedding = self._chunk_embeddings.get((content_hash, model))
+                if embedding is not None:
+                    known[content_hash] = embedding
+        
+        lookup = [content_hash for content_hash in unique_texts if content_hash not in known]
+        if lookup:
+            try:
+                known.update(self.db_client.lookup_embedding_cache(lookup, model))
+            except Exception as e:
+                logger.warning(f"Could not look up cached chunk embeddings: {str(e)}")
+        
+        missing = [content_hash for content_hash in unique_texts if content_hash not in known]
+        logger.info(
+            f"Generating embeddings for {len(missing)} of {len(texts)} chunks "
+            f"({len(texts) - len(missing)} duplicate or already stored)..."
+        )
+        if missing:
+            new_embeddings = self.embedding_service.embed_batch(
+                [unique_texts[content_hash] for content_hash in missing]
             )
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"Error ingesting file {file_path}: {str(e)}")
-            return {
-                "success": False,
-                "file_name": file_path.name,
-                "error": str(e),
-                "chunks_created": 0
+            embedded = {
+                content_hash: embedding
+                for content_hash, embedding in zip(missing, new_embeddings)
+                if embedding is not None
             }
+            known.update(embedded)
+            try:
+                self.db_client.store_embedding_cache(embedded, model)
+            except Exception as e:
+                logger.warning(f"Could not cache chunk embeddings: {str(e)}")
+        
+        with self._chunk_embeddings_lock:
+            for content_hash, embedding in known.items():
+                self._chunk_embeddings[(content_hash, model)] = embedding
+        
+        embeddings = [known.get(content_hash) for content_hash in hashes]
+        failed = sum(1 for embedding in embeddings if embedding is None)
+        if failed:
+            error_msg = f"Could not embed {failed} of {len(texts)} chunks"
+            logger.error(error_msg)
+            errors.append(error_msg)
+        return embeddings
     
     def ingest_directory(
         self,
@@ -137,10 +639,19 @@ class IngestionPipeline:
         lesson: str = None,
         concept: str = None,
         version: int = 1,
+        include_hidden: bool = False,
+        progress_callback: Optional[Callable[[int, int, Dict], None]] = None,
     ) -> List[Dict]:
         """
         Ingest all supported files from a directory
         
+        Files are parsed and chunked in a process pool (CPU-bound; a lone
+        file is parsed in-process), while duplicate checks, embedding and
+        storage run in a thread pool (network-bound), so the stages overlap
+        across files. Directories with
+        at least Config.BULK_LOAD_MIN_FILES files are loaded with the vector
+        index dropped and rebuilt afterwards.
+        
         Args:
             directory_path: Path to directory containing files
             module: Module name (optional)
@@ -148,6 +659,9 @@ class IngestionPipeline:
             lesson: Lesson name (optional)
             concept: Concept name (optional)
             version: Version number (default: 1)
+            include_hidden: Also ingest dotfiles and files in dot-directories
+            progress_callback: Called as (completed, total, result) each time a
+                file finishes, from the calling thread
             
         Returns:
             List of ingestion results
@@ -158,30 +672,148 @@ class IngestionPipeline:
         
         results = []
         supported_files = []
+        max_bytes = Config.MAX_FILE_SIZE_MB * 1024 * 1024
         
-        # Find all supported files
-        for ext in self.doc_processor.supported_formats:
-            supported_files.extend(directory.rglob(f"*{ext}"))
+        # Find all supported files in a single walk
+        extensions = frozenset(self.doc_processor.supported_formats)
+        for entry in _scandir_recursive(str(directory), extensions, include_hidden):
+            if entry.stat().st_size > max_bytes:
+                logger.warning(f"Skipping {entry.name}: exceeds {Config.MAX_FILE_SIZE_MB} MB limit")
+                results.append({
+                    "success": False,
+                    "file_name": entry.name,
+                    "error": f"File exceeds the {Config.MAX_FILE_SIZE_MB} MB size limit",
+                    "chunks_created": 0
+                })
+                continue
+            supported_files.append(entry.path)
         
         # Sort for consistent processing order
-        supported_files = sorted(supported_files)
+        supported_files.sort()
         
         logger.info(f"Found {len(supported_files)} files to ingest in {directory_path}")
+        if not supported_files:
+            return results
         
-        for file_path in supported_files:
-            result = self.ingest_file(
-                str(file_path),
-                module=module,
-                chapter=chapter,
-                lesson=lesson,
-                concept=concept,
-                version=version,
+        # Large loads go faster without maintaining the vector index per row
+        bulk_load = len(supported_files) >= Config.BULK_LOAD_MIN_FILES
+        if bulk_load:
+            try:
+                self.db_client.begin_bulk_load()
+            except Exception as e:
+                logger.warning(f"Bulk load mode unavailable, keeping the vector index: {str(e)}")
+                bulk_load = False
+        
+        try:
+            results_by_path = self._ingest_files(
+                supported_files, module, chapter, lesson, concept, version, progress_callback
             )
-            results.append(result)
+        finally:
+            # A failed rebuild is reported via vector_index_missing, not raised,
+            # so it cannot discard the per-file results
+            if bulk_load:
+                self.rebuild_vector_index()
         
+        results.extend(results_by_path[file_path] for file_path in supported_files)
         return results
     
-    def get_ingestion_status(self, source_file: str = None) -> List[Dict]:
-        """Get ingestion status for files"""
-        return self.db_client.get_ingestion_status(source_file)
-
+    def rebuild_vector_index(self) -> bool:
+        """
+        Rebuild the vector index dropped for a bulk load
+        
+        Returns:
+            True if the index was rebuilt; otherwise vector_index_missing is set
+            and vector search runs as a sequential scan until a retry succeeds
+        """
+        try:
+            self.db_client.end_bulk_load()
+        except Exception as e:
+            logger.error(
+                f"Vector index was not rebuilt after bulk load and must be recreated "
+                f"(IngestionPipeline.rebuild_vector_index or create_course_content_hnsw_index): {str(e)}"
+            )
+            self.vector_index_missing = True
+            return False
+        self.vector_index_missing = False
+        return True
+    
+    def _ingest_files(
+        self,
+        supported_files: List[str],
+        module: str,
+        chapter: str,
+        lesson: str,
+        concept: str,
+        version: int,
+        progress_callback: Optional[Callable[[int, int, Dict], None]],
+    ) -> Dict[str, Dict]:
+        """Run the check/parse/store stages over files, returning results keyed by path"""
+        total = len(supported_files)
+        completed = 0
+        results_by_path = {}
+        parse_workers = min(Config.INGEST_WORKERS, total)
+        store_workers = min(Config.INGEST_STORE_WORKERS, total)
+        
+        # A single file isn't worth starting worker processes for; it is parsed
+        # on a store thread instead
+        parse_pool = (
+            ProcessPoolExecutor(max_workers=parse_workers, mp_context=WORKER_CONTEXT)
+            if total > 1 else None
+        )
+        
+        with parse_pool or nullcontext(), \
+                ThreadPoolExecutor(max_workers=store_workers) as store_pool:
+            pending = {}
+            for file_path in supported_files:
+                metadata = self._build_metadata(module, chapter, lesson, concept, version)
+                future = store_pool.submit(self._check_already_ingested, Path(file_path), version)
+                pending[future] = ("check", Path(file_path), metadata, datetime.now())
+            
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage, file_path, metadata, start_time = pending.pop(future)
+                    if stage == "check":
+                        try:
+                            file_hash, result = future.result()
+                        except Exception as e:
+                            result = self._failure_result(file_path, e)
+                        else:
+                            if result is None:
+                                # New content: hand the file to the parse stage
+                                metadata["file_hash"] = file_hash
+                                if parse_pool is not None:
+                                    parse_future = parse_pool.submit(
+                                        process_file_in_worker, str(file_path), metadata
+                                    )
+                                else:
+                                    parse_future = store_pool.submit(
+                                        self.doc_processor.process_file, str(file_path), metadata
+                                    )
+                                pending[parse_future] = ("parse", file_path, metadata, start_time)
+                                continue
+                    elif stage == "parse":
+                        try:
+                            chunks = future.result()
+                        except Exception as e:
+                            result = self._failure_result(file_path, e)
+                        else:
+                            # Hand parsed chunks to the embedding/storage stage
+                            store_future = store_pool.submit(
+                                self._store_chunks, file_path, chunks, metadata, start_time
+                            )
+                            pending[store_future] = ("store", file_path, metadata, start_time)
+                            continue
+                    else:
+                        result = future.result()
+                    
+                    results_by_path[str(file_path)] = result
+                    completed += 1
+                    if progress_callback:
+                        progress_callback(completed, total, result)
+        
+        return results_by_path
+    
+    def get_ingestion_status(self, source_file: str = None, limit: int = 200, offset: int = 0) -> List[Dict]:
+        """Get one page of ingestion status rows, newest first"""
+        return self.db_client.get_ingestion_status(source_file, limit=limit, offset=offset)
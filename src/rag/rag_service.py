@@ -9,13 +9,30 @@ Responsible for:
 
 from typing import List, Dict, Optional, Tuple
 import logging
+import threading
+
+import numpy as np
+from cachetools import LRUCache
 
 from ..embeddings.embedding_service import EmbeddingService
 from ..database.supabase_client import SupabaseClient
+from .semantic_cache import SemanticCache
 from config import Config
 
 logger = logging.getLogger(__name__)
 
+# Course hierarchy shown in each context section header
+_PATH_KEYS = ("module", "chapter", "lesson")
+
+# One-word messages with nothing to look up in course content
+STOPWORD_SET = frozenset({"hi", "hello", "hey", "thanks", "thank", "ok", "yes", "no"})
+
+
+def is_trivial_query(query: str) -> bool:
+    """True for greetings and acknowledgements that no course chunk can answer."""
+    words = query.split()
+    return len(words) == 1 and words[0].lower().strip("!?.") in STOPWORD_SET
+
 
 class RAGService:
     """High-level service for Retrieval-Augmented Generation."""
@@ -25,6 +42,44 @@ class RAGService:
         self.embedding_service = EmbeddingService()
         self.top_k = min(Config.RAG_TOP_K, 8) if hasattr(Config, "RAG_TOP_K") else 8
         self.match_threshold = getattr(Config, "RAG_MATCH_THRESHOLD", 0.7)
+        # Query embeddings are deterministic per model, so they need no TTL
+        self._query_embeddings = LRUCache(maxsize=Config.QUERY_EMBEDDING_CACHE_SIZE)
+        self._query_embeddings_lock = threading.Lock()
+        # Paraphrased queries with the same filters reuse an earlier vector search
+        self._semantic_cache = SemanticCache(
+            dim=Config.VECTOR_DIMENSION,
+            max_entries=Config.SEMANTIC_CACHE_SIZE,
+            threshold=Config.SEMANTIC_CACHE_THRESHOLD,
+            ttl_seconds=Config.RETRIEVAL_CACHE_TTL,
+        )
+
+    def _query_embedding(self, query: str) -> Tuple[np.ndarray, str]:
+        """
+        Embed a query, reusing the embedding for queries seen before (errors aren't cached).
+
+        Returns the embedding as a float32 array (for the semantic cache) and as
+        a pgvector literal (for the RPC), both computed once per cached query.
+        """
+        with self._query_embeddings_lock:
+            cached = self._query_embeddings.get(query)
+        if cached is None:
+            embedding = self.embedding_service.generate_embedding(
+                query, task_type="retrieval_query"
+            )
+            cached = (np.asarray(embedding, dtype=np.float32), SupabaseClient.vector_literal(embedding))
+            with self._query_embeddings_lock:
+                self._query_embeddings[query] = cached
+        return cached
+
+    def embed_query(self, query: str) -> np.ndarray:
+        """Unit-length float32 embedding of a query, shared with retrieve_context's cache."""
+        return self._query_embedding(query)[0]
+
+    def clear_cache(self) -> None:
+        """Drop cached query embeddings and retrievals (e.g. after switching embedding models)."""
+        with self._query_embeddings_lock:
+            self._query_embeddings.clear()
+        self._semantic_cache.clear()
 
     def retrieve_context(
         self,
@@ -42,19 +97,26 @@ class RAGService:
         if not query or not query.strip():
             raise ValueError("Query cannot be empty")
 
+        # Greetings and acknowledgements skip the embedding call and vector search
+        if Config.SKIP_TRIVIAL_QUERIES and is_trivial_query(query):
+            return []
+
         # 1) Vector search using query embedding
         try:
-            query_embedding = self.embedding_service.generate_embedding(
-                query, task_type="retrieval_query"
-            )
+            query_embedding, query_vector = self._query_embedding(query)
         except Exception as e:
             logger.error(f"Failed to generate query embedding: {e}")
             # As a fallback, try pure keyword search
             return self._keyword_fallback(query, filters)
 
+        filters_key = tuple(sorted(filters.items())) if filters else ()
+        cached = self._semantic_cache.lookup(query_embedding, filters_key)
+        if cached is not None:
+            return cached
+
         try:
             results = self.db_client.search_similar(
-                query_embedding=query_embedding,
+                query_embedding=query_vector,
                 top_k=self.top_k,
                 filters=filters,
                 match_threshold=self.match_threshold,
@@ -67,7 +129,9 @@ class RAGService:
 
             # Enforce Spotlight namespace implicitly by only querying course_content table
             # (handled inside Supabase RPC)
-            return results[: self.top_k]
+            results = results[: self.top_k]
+            self._semantic_cache.add(query_embedding, filters_key, results)
+            return results
 
         except Exception as e:
             logger.error(f"Error during vector retrieval, using keyword fallback: {e}")
@@ -100,25 +164,16 @@ class RAGService:
 
         context_sections = []
         for idx, item in enumerate(chunks, start=1):
-            content = item.get("content") or item.get("chunk") or ""
-            metadata = item.get("metadata", {}) or {}
+            # Metadata wins; RPC rows also carry the same fields as columns
+            metadata = item.get("metadata") or {}
             source_file = metadata.get("source_file") or item.get("source_file", "Unknown source")
-            module = metadata.get("module") or item.get("module") or ""
-            chapter = metadata.get("chapter") or item.get("chapter") or ""
-            lesson = metadata.get("lesson") or item.get("lesson") or ""
-
-            header_parts = [f"Source {idx}: {source_file}"]
-            path_parts = [p for p in [module, chapter, lesson] if p]
-            if path_parts:
-                header_parts.append(f"({' > '.join(path_parts)})")
-
-            header = " ".join(header_parts)
-
-            context_sections.append(
-                f"{header}\n---\n{content.strip()}"
+            path = " > ".join(
+                part for part in (metadata.get(key) or item.get(key) for key in _PATH_KEYS) if part
             )
+            header = f"Source {idx}: {source_file} ({path})" if path else f"Source {idx}: {source_file}"
+            content = (item.get("content") or item.get("chunk") or "").strip()
+            context_sections.append(f"{header}\n---\n{content}")
 
-        full_context = "\n\n".join(context_sections)
-        return full_context, chunks
+        return "\n\n".join(context_sections), chunks
 
 
@@ -0,0 +1,68 @@
+"""
+In-process semantic cache for retrieval results (Sprint 2).
+
+Maps unit-length query embeddings to the chunks vector search returned for
+them. A new query whose embedding is close enough (inner product = cosine
+similarity above a threshold) to a cached one, with the same filters, reuses
+those chunks instead of another pgvector search. Paraphrases such as
+"What is chapter 3?" and "Tell me about chapter 3" then share one search.
+
+Lookups are a single matrix-vector product over at most ``max_entries`` rows.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+
+class SemanticCache:
+    """Fixed-capacity cache of (query embedding, filters) -> chunks with LRU replacement and TTL."""
+
+    def __init__(self, dim: int, max_entries: int = 1000, threshold: float = 0.95, ttl_seconds: float = 900):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self._embeddings = np.zeros((max_entries, dim), dtype=np.float32)
+        self._filters: List[Optional[Tuple]] = [None] * max_entries
+        self._chunks: List[Optional[List[Dict]]] = [None] * max_entries
+        self._created = np.zeros(max_entries)
+        # -inf marks an empty slot; it is both never matched and first replaced
+        self._last_used = np.full(max_entries, -np.inf)
+        self._lock = threading.Lock()
+
+    def lookup(self, embedding: List[float], filters: Tuple) -> Optional[List[Dict]]:
+        """Return cached chunks for the most similar live entry with these filters, if above threshold."""
+        query = np.asarray(embedding, dtype=np.float32)
+        now = time.monotonic()
+        with self._lock:
+            scores = self._embeddings @ query
+            live = (self._last_used > -np.inf) & (now - self._created < self.ttl_seconds)
+            scores[~live] = -np.inf
+            # Best matches first; stop at the first one below threshold
+            for slot in np.argsort(scores)[::-1]:
+                if scores[slot] < self.threshold:
+                    return None
+                if self._filters[slot] == filters:
+                    self._last_used[slot] = now
+                    return self._chunks[slot]
+        return None
+
+    def add(self, embedding: List[float], filters: Tuple, chunks: List[Dict]) -> None:
+        """Store chunks for a query, replacing the least recently used (or expired) entry."""
+        now = time.monotonic()
+        with self._lock:
+            expired = now - self._created >= self.ttl_seconds
+            last_used = np.where(expired, -np.inf, self._last_used)
+            slot = int(np.argmin(last_used))
+            self._embeddings[slot] = embedding
+            self._filters[slot] = filters
+            self._chunks[slot] = chunks
+            self._created[slot] = now
+            self._last_used[slot] = now
+
+    def clear(self) -> None:
+        with self._lock:
+            self._last_used[:] = -np.inf
+            self._filters = [None] * len(self._filters)
+            self._chunks = [None] * len(self._chunks)
@@ -0,0 +1,77 @@
+"""
+In-process chat session store (Sprint 2).
+
+Keeps per-student conversation state between turns so that follow-up
+questions on the same topic can reuse the previous retrieval and Gemini chat history instead of
+re-embedding the query and re-running vector search.
+
+State lives in the worker process; with several Uvicorn workers a student may
+land on a worker without their session, which simply falls back to a fresh turn.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+
+class ChatSession:
+    """Conversation state for a single student."""
+
+    def __init__(self, retrieved: List[Dict], filter_items: Tuple, chat: Any, query_embedding: Any):
+        self.retrieved = retrieved
+        self.filter_items = filter_items
+        # Unit-length embedding of the question the retrieval was made for
+        self.query_embedding = query_embedding
+        # google.generativeai ChatSession carrying the running history
+        self.chat = chat
+        self.last_access = time.monotonic()
+
+
+class SessionStore:
+    """LRU store of ChatSession objects keyed by student_id, with idle TTL eviction."""
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 1800):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self._sessions: "OrderedDict[str, ChatSession]" = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    async def get(self, student_id: str) -> Optional[ChatSession]:
+        async with self._lock:
+            self._evict_expired()
+            session = self._sessions.get(student_id)
+            if session is not None:
+                session.last_access = time.monotonic()
+                self._sessions.move_to_end(student_id)
+            return session
+
+    async def put(self, student_id: str, session: ChatSession) -> None:
+        async with self._lock:
+            self._sessions[student_id] = session
+            self._sessions.move_to_end(student_id)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    async def take(self, student_id: str, session: ChatSession) -> bool:
+        """
+        Remove ``session`` for the duration of a turn that continues its chat.
+
+        Returns False if another request already took or replaced it. Gemini
+        chats are not safe for concurrent turns, so only one request at a time
+        may hold a student's session; the turn puts it back when it succeeds.
+        """
+        async with self._lock:
+            if self._sessions.get(student_id) is not session:
+                return False
+            del self._sessions[student_id]
+            return True
+
+    def _evict_expired(self) -> None:
+        cutoff = time.monotonic() - self.ttl_seconds
+        # Least recently used sessions sit at the front
+        while self._sessions:
+            student_id, session = next(iter(self._sessions.items()))
+            if session.last_access >= cutoff:
+                break
+            del self._sessions[student_id]
@@ -0,0 +1,95 @@
+"""
+The SSE chat stream must reach the client unbuffered through the gzip middleware.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sys
+
+import orjson
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure project root is on sys.path so chat_api and src.* import
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import chat_api  # noqa: E402
+
+# Enough sources that the meta event alone is over the 1 KB gzip threshold
+RETRIEVED = [
+    {"content": "x" * 300, "metadata": {"source_file": f"lesson_{i}.pdf"}} for i in range(8)
+]
+
+
+class _FakeChunk:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class _FakeStream:
+    def __init__(self, parts):
+        self._parts = parts
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for part in self._parts:
+            yield _FakeChunk(part)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_prepare_turn(rag_service, payload):
+        return RETRIEVED, None, [], None
+
+    async def fake_generate(session, content, stream=False):
+        if stream:
+            return _FakeStream(["Gradient", " descent"])
+        return _FakeChunk("y" * 2000)
+
+    async def fake_remember_turn(*args):
+        return None
+
+    monkeypatch.setattr(chat_api, "_prepare_turn", fake_prepare_turn)
+    monkeypatch.setattr(chat_api, "_generate", fake_generate)
+    monkeypatch.setattr(chat_api, "_remember_turn", fake_remember_turn)
+    chat_api.app.dependency_overrides[chat_api.get_rag_service] = lambda: None
+    yield TestClient(chat_api.app)
+    chat_api.app.dependency_overrides.clear()
+
+
+def test_stream_is_not_gzipped(client):
+    with client.stream(
+        "POST",
+        "/api/chat/stream",
+        json={"message": "What is gradient descent?"},
+        headers={"Accept-Encoding": "gzip"},
+    ) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "content-encoding" not in response.headers
+        events = [
+            orjson.loads(line[len("data: "):])
+            for line in response.iter_lines()
+            if line.startswith("data: ")
+        ]
+
+    assert [event["type"] for event in events] == ["meta", "delta", "delta", "done"]
+    assert len(events[0]["sources"]) == len(RETRIEVED)
+    assert "".join(event["text"] for event in events if event["type"] == "delta") == "Gradient descent"
+
+
+def test_json_responses_are_still_gzipped(client):
+    response = client.post(
+        "/api/chat",
+        json={"message": "What is gradient descent?"},
+        headers={"Accept-Encoding": "gzip"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == "gzip"
+    assert response.json()["answer"] == "y" * 2000
@@ -0,0 +1,153 @@
+"""
+TextChunker boundaries, pinned with a deterministic tokenizer.
+
+The fake tokenizer counts every word and every whitespace run as one token,
+so token counts of joined text are exactly the sum of the parts and the
+separators, and expected chunk boundaries can be computed by hand.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import re
+import sys
+
+import pytest
+
+# Ensure project root is on sys.path so src.* imports
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from src.ingestion import chunking  # noqa: E402
+from src.ingestion.chunking import TextChunker  # noqa: E402
+
+_TOKEN_RE = re.compile(r"\S+|\s+")
+
+
+def _fake_tokenizer(texts, add_special_tokens=False, verbose=False):
+    return {"input_ids": [_TOKEN_RE.findall(text) for text in texts]}
+
+
+@pytest.fixture
+def chunker(monkeypatch):
+    monkeypatch.setattr(chunking.Config, "EMBEDDING_PROVIDER", "local")
+    monkeypatch.setattr(chunking.Config, "CHUNK_SIZE", 500)
+    monkeypatch.setattr(chunking, "_local_model_tokenizer", lambda model_name: _fake_tokenizer)
+    return TextChunker()
+
+
+def _paragraph(words: int, prefix: str = "w") -> str:
+    """A paragraph of ``words`` distinct words, i.e. 2 * words - 1 tokens."""
+    return " ".join(f"{prefix}{i}" for i in range(words))
+
+
+def _tokens(chunker: TextChunker, text: str) -> int:
+    return chunker.count_tokens(text)
+
+
+def test_separator_tokens_count_towards_chunk_size(chunker):
+    # 249 + 251 tokens fit in 500 only if the "\n\n" between them is ignored
+    first, second = _paragraph(125, "a"), _paragraph(126, "b")
+
+    chunks = chunker.chunk_text(f"{first}\n\n{second}")
+
+    assert [chunk["content"] for chunk in chunks] == [first, second]
+
+
+def test_paragraphs_are_packed_up_to_chunk_size(chunker):
+    # 249 + 1 + 249 = 499 tokens fit; a third paragraph does not
+    paragraphs = [_paragraph(125, prefix) for prefix in "abc"]
+
+    chunks = chunker.chunk_text("\n\n".join(paragraphs))
+
+    assert [chunk["content"] for chunk in chunks] == [
+        f"{paragraphs[0]}\n\n{paragraphs[1]}",
+        paragraphs[2],
+    ]
+
+
+def test_chunks_never_exceed_limit_and_keep_every_word(chunker):
+    # Every paragraph fits on its own (at most 499 tokens); packing decides the rest
+    sizes = [30, 240, 90, 120, 200, 15, 250, 249, 70, 10, 180]
+    paragraphs = [_paragraph(size, f"p{index}_") for index, size in enumerate(sizes)]
+    text = "\n\n".join(paragraphs)
+
+    chunks = chunker.chunk_text(text)
+
+    assert all(_tokens(chunker, chunk["content"]) <= 500 for chunk in chunks)
+    assert " ".join(chunk["content"] for chunk in chunks).split() == text.split()
+
+
+def test_oversized_paragraph_is_split_by_sentences(chunker):
+    sentences = [_paragraph(40, f"s{i}_") for i in range(20)]
+    paragraph = ". ".join(sentences)
+
+    chunks = chunker.chunk_text(paragraph)
+
+    assert len(chunks) > 1
+    assert all(_tokens(chunker, chunk["content"]) <= 500 for chunk in chunks)
+    # Sentence-split chunks are joined with spaces; no words are lost or reordered
+    assert " ".join(chunk["content"] for chunk in chunks).split() == paragraph.replace(". ", " ").split()
+
+
+def test_short_chunk_after_a_full_chunk_is_kept(chunker):
+    # 449 + 1 + 99 tokens exceed 500, so the short paragraph can't be merged
+    long, short = _paragraph(225, "a"), _paragraph(50, "b")
+
+    chunks = chunker.chunk_text(f"{long}\n\n{short}")
+
+    assert [chunk["content"] for chunk in chunks] == [long, short]
+
+
+def test_short_document_becomes_one_chunk(chunker):
+    text = _paragraph(50)
+
+    assert [chunk["content"] for chunk in chunker.chunk_text(text)] == [text]
+
+
+def test_short_chunk_is_merged_into_previous_chunk(chunker):
+    first, short = _paragraph(125, "a"), _paragraph(50, "b")
+    chunker._iter_raw_chunks = lambda text: iter([first, short])
+
+    chunks = chunker.chunk_text("ignored")
+
+    assert [chunk["content"] for chunk in chunks] == [f"{first}\n\n{short}"]
+
+
+def test_noise_chunks_are_dropped(chunker):
+    page_number = "12"
+    dots = " ".join(["....."] * 40)
+    chunker._iter_raw_chunks = lambda text: iter([page_number, dots, _paragraph(150)])
+
+    chunks = chunker.chunk_text("ignored")
+
+    assert [chunk["content"] for chunk in chunks] == [_paragraph(150)]
+
+
+def test_iterable_input_matches_joined_text(chunker):
+    pages = [_paragraph(size, f"page{index}_") for index, size in enumerate([120, 300, 80, 260])]
+
+    from_pages = chunker.chunk_text(iter(pages))
+    from_text = chunker.chunk_text("\n\n".join(pages))
+
+    assert from_pages == from_text
+
+
+def test_iter_chunks_consumes_pages_lazily(chunker):
+    consumed = []
+
+    def pages():
+        for index in range(1000):
+            consumed.append(index)
+            yield _paragraph(240, f"page{index}_")
+
+    first = next(chunker.iter_chunks(pages(), {"source_file": "notes.pdf"}))
+
+    assert first["metadata"] == {"source_file": "notes.pdf"}
+    assert len(consumed) < 1000
+
+
+def test_blank_input_has_no_chunks(chunker):
+    assert chunker.chunk_text("") == []
+    assert chunker.chunk_text("  \n\n  ") == []
@@ -0,0 +1,92 @@
+"""
+EmbeddingService batching: result types, per-text retries and the shared batch pool.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+# Ensure project root is on sys.path so src.* imports
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from src.embeddings import embedding_service  # noqa: E402
+from src.embeddings.embedding_service import EmbeddingService  # noqa: E402
+
+
+class _FakeGoogleService(EmbeddingService):
+    """Embeds a text as [len(text), 1, 0, ...]; batches containing "bad" fail."""
+
+    def _init_google(self):
+        self.single_calls = 0
+
+    def _generate_google_batch(self, texts, task_type):
+        if any("bad" in text for text in texts):
+            raise RuntimeError("batch rejected")
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def _generate_google(self, text, task_type):
+        self.single_calls += 1
+        if text == "bad":
+            raise RuntimeError("text rejected")
+        return [float(len(text)), 1.0]
+
+
+@pytest.fixture
+def service(monkeypatch):
+    monkeypatch.setattr(embedding_service.Config, "validate", classmethod(lambda cls: None))
+    monkeypatch.setattr(embedding_service.Config, "EMBEDDING_PROVIDER", "google")
+    monkeypatch.setattr(embedding_service.Config, "EMBEDDING_BATCH_SIZE", 4)
+    return _FakeGoogleService()
+
+
+def _expected(text: str, dim: int) -> np.ndarray:
+    vector = np.zeros(dim, dtype=np.float32)
+    vector[:2] = [len(text), 1.0]
+    return vector / np.linalg.norm(vector)
+
+
+def test_embed_batch_keeps_order_across_concurrent_batches(service):
+    texts = [f"text {'x' * i}" for i in range(11)]
+
+    embeddings = service.embed_batch(texts)
+
+    assert len(embeddings) == len(texts)
+    for text, embedding in zip(texts, embeddings):
+        np.testing.assert_allclose(embedding, _expected(text, service.target_dim), rtol=1e-6)
+
+
+def test_failed_batch_is_retried_per_text(service):
+    texts = ["alpha", "bad", "gamma", "delta"]
+
+    embeddings = service.embed_batch(texts)
+
+    assert embeddings[1] is None
+    assert service.single_calls == len(texts)
+    np.testing.assert_allclose(embeddings[0], _expected("alpha", service.target_dim), rtol=1e-6)
+
+
+def test_batch_and_retry_paths_return_the_same_type(service):
+    batched = service.embed_batch(["alpha", "beta"])
+    retried = service.embed_batch(["alpha", "bad"])
+    single = service.generate_embedding("alpha")
+
+    for embedding in (batched[0], retried[0], single):
+        assert isinstance(embedding, np.ndarray)
+        assert embedding.dtype == np.float32
+        assert embedding.shape == (service.target_dim,)
+
+
+def test_services_share_one_batch_pool(service):
+    other = _FakeGoogleService()
+
+    service.embed_batch(["a"] * 9)
+    other.embed_batch(["b"] * 9)
+
+    assert embedding_service._batch_pool() is embedding_service._batch_pool()
+    assert not hasattr(service, "_batch_pool")
@@ -0,0 +1,211 @@
+"""
+Ingestion pipeline helpers: directory discovery and chunk embedding reuse.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sys
+import threading
+
+import numpy as np
+import pytest
+from cachetools import LRUCache
+
+# Ensure project root is on sys.path so src.* imports
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from src.ingestion.ingestion_pipeline import (  # noqa: E402
+    IngestionPipeline,
+    _content_hash,
+    _scandir_recursive,
+)
+
+EXTENSIONS = frozenset({".pdf", ".docx"})
+
+
+def _touch(root, relative):
+    path = root.joinpath(*relative.split("/"))
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"x")
+    return path
+
+
+def _found(root, **kwargs):
+    return sorted(
+        os.path.relpath(entry.path, root).replace(os.sep, "/")
+        for entry in _scandir_recursive(str(root), EXTENSIONS, **kwargs)
+    )
+
+
+def test_only_supported_extensions_are_yielded(tmp_path):
+    for name in ["a.pdf", "b.DOCX", "c.txt", "d", "e.pdf.bak"]:
+        _touch(tmp_path, name)
+
+    assert _found(tmp_path) == ["a.pdf", "b.DOCX"]
+
+
+def test_directories_named_like_files_are_not_yielded(tmp_path):
+    (tmp_path / "slides.pdf").mkdir()
+    _touch(tmp_path, "slides.pdf/inner.docx")
+
+    assert _found(tmp_path) == ["slides.pdf/inner.docx"]
+
+
+def test_hidden_files_and_directories_are_skipped_by_default(tmp_path):
+    for name in [".draft.pdf", ".cache/a.pdf", "notes/.hidden/b.pdf", "notes/c.pdf"]:
+        _touch(tmp_path, name)
+
+    assert _found(tmp_path) == ["notes/c.pdf"]
+    assert _found(tmp_path, include_hidden=True) == [
+        ".cache/a.pdf",
+        ".draft.pdf",
+        "notes/.hidden/b.pdf",
+        "notes/c.pdf",
+    ]
+
+
+def test_deeply_nested_files_are_found(tmp_path):
+    depth = sys.getrecursionlimit() // 10
+    deep = "/".join(["d"] * depth) + "/lesson.pdf"
+    _touch(tmp_path, deep)
+    _touch(tmp_path, "top.pdf")
+
+    assert _found(tmp_path) == [deep, "top.pdf"]
+
+
+def test_symlinked_directories_are_not_followed(tmp_path):
+    outside = tmp_path / "outside"
+    _touch(outside, "elsewhere.pdf")
+    root = tmp_path / "root"
+    _touch(root, "here.pdf")
+    try:
+        (root / "link").symlink_to(outside, target_is_directory=True)
+        # A cycle back to the root must not loop forever either
+        (root / "loop").symlink_to(root, target_is_directory=True)
+    except (OSError, NotImplementedError):
+        pytest.skip("symlinks are not supported here")
+
+    assert _found(root) == ["here.pdf"]
+
+
+def test_empty_directory_yields_nothing(tmp_path):
+    assert _found(tmp_path) == []
+
+
+class _FakeEmbeddingService:
+    model_name = "test-model"
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+
+    def embed_batch(self, texts):
+        self.calls.append(list(texts))
+        return [None if text in self.fail else np.full(3, len(text), dtype=np.float32) for text in texts]
+
+
+class _FakeDbClient:
+    def __init__(self, cached=None):
+        self.cached = dict(cached or {})
+        self.lookups = []
+        self.stored = []
+
+    def lookup_embedding_cache(self, content_hashes, model):
+        self.lookups.append(list(content_hashes))
+        return {h: self.cached[(h, model)] for h in content_hashes if (h, model) in self.cached}
+
+    def store_embedding_cache(self, embeddings, model):
+        self.stored.append(dict(embeddings))
+        self.cached.update({(h, model): embedding for h, embedding in embeddings.items()})
+
+
+def _pipeline(embedding_service=None, db_client=None):
+    pipeline = IngestionPipeline.__new__(IngestionPipeline)
+    pipeline.embedding_service = embedding_service or _FakeEmbeddingService()
+    pipeline.db_client = db_client or _FakeDbClient()
+    pipeline._chunk_embeddings = LRUCache(maxsize=16)
+    pipeline._chunk_embeddings_lock = threading.Lock()
+    return pipeline
+
+
+def test_duplicate_texts_are_embedded_once():
+    pipeline = _pipeline()
+    errors = []
+
+    embeddings = pipeline._embed_chunks(["footer", "body text", "footer"], errors)
+
+    assert pipeline.embedding_service.calls == [["footer", "body text"]]
+    assert [e[0] for e in embeddings] == [6, 9, 6]
+    assert errors == []
+
+
+def test_new_embeddings_are_written_back_to_the_db_cache():
+    pipeline = _pipeline()
+
+    pipeline._embed_chunks(["alpha", "beta"], [])
+
+    assert len(pipeline.db_client.stored) == 1
+    assert set(pipeline.db_client.stored[0]) == {_content_hash("alpha"), _content_hash("beta")}
+
+
+def test_db_cache_hits_skip_embedding():
+    cached = np.ones(3, dtype=np.float32)
+    db_client = _FakeDbClient({(_content_hash("alpha"), "test-model"): cached})
+    pipeline = _pipeline(db_client=db_client)
+
+    embeddings = pipeline._embed_chunks(["alpha", "beta"], [])
+
+    assert pipeline.embedding_service.calls == [["beta"]]
+    assert embeddings[0] is cached
+    assert set(db_client.stored[0]) == {_content_hash("beta")}
+
+
+def test_db_cache_is_per_model():
+    db_client = _FakeDbClient({(_content_hash("alpha"), "other-model"): np.ones(3, dtype=np.float32)})
+    pipeline = _pipeline(db_client=db_client)
+
+    pipeline._embed_chunks(["alpha"], [])
+
+    assert pipeline.embedding_service.calls == [["alpha"]]
+
+
+def test_recently_seen_texts_skip_the_db_lookup():
+    pipeline = _pipeline()
+    pipeline._embed_chunks(["alpha"], [])
+
+    embeddings = pipeline._embed_chunks(["alpha", "beta"], [])
+
+    assert pipeline.db_client.lookups == [[_content_hash("alpha")], [_content_hash("beta")]]
+    assert pipeline.embedding_service.calls == [["alpha"], ["beta"]]
+    assert embeddings[0][0] == 5
+
+
+def test_db_lookup_failure_falls_back_to_embedding():
+    class _BrokenDbClient(_FakeDbClient):
+        def lookup_embedding_cache(self, content_hashes, model):
+            raise ConnectionError("database unavailable")
+
+    pipeline = _pipeline(db_client=_BrokenDbClient())
+    errors = []
+
+    embeddings = pipeline._embed_chunks(["alpha"], errors)
+
+    assert embeddings[0][0] == 5
+    assert errors == []
+
+
+def test_failed_texts_come_back_as_none_with_an_error():
+    pipeline = _pipeline(embedding_service=_FakeEmbeddingService(fail={"bad"}))
+    errors = []
+
+    embeddings = pipeline._embed_chunks(["good", "bad", "bad"], errors)
+
+    assert embeddings[0] is not None
+    assert embeddings[1:] == [None, None]
+    assert errors == ["Could not embed 2 of 3 chunks"]
+    # Failures are neither cached in the database nor remembered in memory
+    assert set(pipeline.db_client.stored[0]) == {_content_hash("good")}
+    assert (_content_hash("bad"), "test-model") not in pipeline._chunk_embeddings
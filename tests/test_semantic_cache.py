@@ -0,0 +1,109 @@
+"""
+SemanticCache: near-duplicate queries with the same filters share cached
+chunks; LRU replacement and TTL expiry keep it bounded and fresh.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Ensure project root is on sys.path so src.* imports
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from src.rag import semantic_cache  # noqa: E402
+from src.rag.semantic_cache import SemanticCache  # noqa: E402
+
+FILTERS = (("module", "ml"),)
+CHUNKS = [{"content": "gradient descent"}]
+
+
+def _unit(*values):
+    vec = np.asarray(values, dtype=np.float32)
+    return vec / np.linalg.norm(vec)
+
+
+def test_similar_query_with_same_filters_hits():
+    cache = SemanticCache(dim=3)
+    cache.add(_unit(1, 0, 0), FILTERS, CHUNKS)
+
+    assert cache.lookup(_unit(1, 0.1, 0), FILTERS) is CHUNKS
+
+
+def test_dissimilar_query_misses():
+    cache = SemanticCache(dim=3)
+    cache.add(_unit(1, 0, 0), FILTERS, CHUNKS)
+
+    assert cache.lookup(_unit(1, 1, 0), FILTERS) is None
+
+
+def test_different_filters_miss():
+    cache = SemanticCache(dim=3)
+    cache.add(_unit(1, 0, 0), FILTERS, CHUNKS)
+
+    assert cache.lookup(_unit(1, 0, 0), (("module", "stats"),)) is None
+
+
+def test_empty_cache_misses_even_for_zero_threshold():
+    cache = SemanticCache(dim=3, threshold=0.0)
+
+    assert cache.lookup(_unit(1, 0, 0), FILTERS) is None
+
+
+def test_best_match_with_matching_filters_wins():
+    cache = SemanticCache(dim=3)
+    other = [{"content": "other module"}]
+    cache.add(_unit(1, 0, 0), (("module", "stats"),), other)
+    cache.add(_unit(1, 0.2, 0), FILTERS, CHUNKS)
+
+    assert cache.lookup(_unit(1, 0, 0), FILTERS) is CHUNKS
+
+
+def test_least_recently_used_entry_is_replaced(monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: float(next(clock)))
+    cache = SemanticCache(dim=3, max_entries=2)
+    first, second = [{"content": "first"}], [{"content": "second"}]
+    cache.add(_unit(1, 0, 0), FILTERS, first)
+    cache.add(_unit(0, 1, 0), FILTERS, second)
+    # Touch the older entry so the newer one becomes least recently used
+    assert cache.lookup(_unit(1, 0, 0), FILTERS) is first
+
+    cache.add(_unit(0, 0, 1), FILTERS, CHUNKS)
+
+    assert cache.lookup(_unit(1, 0, 0), FILTERS) is first
+    assert cache.lookup(_unit(0, 1, 0), FILTERS) is None
+    assert cache.lookup(_unit(0, 0, 1), FILTERS) is CHUNKS
+
+
+def test_expired_entries_miss_and_are_replaced_first(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(semantic_cache.time, "monotonic", lambda: now[0])
+    cache = SemanticCache(dim=3, max_entries=2, ttl_seconds=10)
+    stale = [{"content": "stale"}]
+    cache.add(_unit(1, 0, 0), FILTERS, stale)
+    now[0] = 5.0
+    cache.add(_unit(0, 1, 0), FILTERS, CHUNKS)
+    now[0] = 6.0
+    assert cache.lookup(_unit(1, 0, 0), FILTERS) is stale
+
+    now[0] = 12.0
+    assert cache.lookup(_unit(1, 0, 0), FILTERS) is None
+    # The expired slot is reused even though it was used more recently
+    fresh = [{"content": "fresh"}]
+    cache.add(_unit(0, 0, 1), FILTERS, fresh)
+    assert cache.lookup(_unit(0, 1, 0), FILTERS) is CHUNKS
+    assert cache.lookup(_unit(0, 0, 1), FILTERS) is fresh
+
+
+def test_clear_empties_the_cache():
+    cache = SemanticCache(dim=3)
+    cache.add(_unit(1, 0, 0), FILTERS, CHUNKS)
+
+    cache.clear()
+
+    assert cache.lookup(_unit(1, 0, 0), FILTERS) is None
@@ -0,0 +1,150 @@
+"""
+Per-student chat sessions: follow-up matching and exclusive use of a session's chat.
+
+Run with: python -m pytest tests
+"""
+
+import asyncio
+import os
+import sys
+
+import numpy as np
+
+# Ensure project root is on sys.path so chat_api and src.* import
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import chat_api  # noqa: E402
+from src.rag.session_store import ChatSession, SessionStore  # noqa: E402
+
+
+def _unit(*values) -> np.ndarray:
+    vector = np.asarray(values, dtype=np.float32)
+    return vector / np.linalg.norm(vector)
+
+
+def _session(embedding=None, chat="chat") -> ChatSession:
+    return ChatSession([{"content": "retrieved"}], (), chat, embedding)
+
+
+def test_get_returns_stored_session():
+    store = SessionStore()
+    session = _session()
+
+    async def scenario():
+        await store.put("s1", session)
+        return await store.get("s1"), await store.get("s2")
+
+    assert asyncio.run(scenario()) == (session, None)
+
+
+def test_least_recently_used_session_is_evicted():
+    store = SessionStore(max_sessions=2)
+
+    async def scenario():
+        await store.put("a", _session())
+        await store.put("b", _session())
+        await store.get("a")
+        await store.put("c", _session())
+        return [await store.get(student_id) is not None for student_id in ("a", "b", "c")]
+
+    assert asyncio.run(scenario()) == [True, False, True]
+
+
+def test_idle_sessions_expire():
+    store = SessionStore(ttl_seconds=60)
+    session = _session()
+
+    async def scenario():
+        await store.put("s1", session)
+        session.last_access -= 61
+        return await store.get("s1")
+
+    assert asyncio.run(scenario()) is None
+
+
+def test_take_gives_a_session_to_one_request_only():
+    store = SessionStore()
+    session = _session()
+
+    async def scenario():
+        await store.put("s1", session)
+        first = await store.take("s1", session)
+        second = await store.take("s1", session)
+        return first, second, await store.get("s1")
+
+    assert asyncio.run(scenario()) == (True, False, None)
+
+
+def test_take_leaves_a_replaced_session_alone():
+    store = SessionStore()
+    old, new = _session(), _session()
+
+    async def scenario():
+        await store.put("s1", old)
+        await store.put("s1", new)
+        return await store.take("s1", old), await store.get("s1")
+
+    assert asyncio.run(scenario()) == (False, new)
+
+
+def test_follow_up_requires_similar_question():
+    session = _session(_unit(1.0, 0.0, 0.0))
+
+    assert chat_api._is_follow_up(session, _unit(1.0, 0.1, 0.0))
+    assert not chat_api._is_follow_up(session, _unit(0.0, 1.0, 0.0))
+    assert not chat_api._is_follow_up(session, None)
+    assert not chat_api._is_follow_up(_session(None), _unit(1.0, 0.0, 0.0))
+
+
+class _FakeRAGService:
+    """Embeds every message to the same vector and counts the calls."""
+
+    def __init__(self):
+        self.embed_calls = 0
+
+    def embed_query(self, query):
+        self.embed_calls += 1
+        return _unit(1.0, 0.0, 0.0)
+
+
+def test_concurrent_follow_ups_do_not_share_a_chat(monkeypatch):
+    store = SessionStore()
+    monkeypatch.setattr(chat_api, "_sessions", store)
+
+    async def fake_fresh_turn(rag_service, payload):
+        return [], [{"role": "user", "parts": ["fresh"]}]
+
+    monkeypatch.setattr(chat_api, "_fresh_turn", fake_fresh_turn)
+    rag_service = _FakeRAGService()
+    session = _session(_unit(1.0, 0.0, 0.0))
+    payload = chat_api.ChatRequest(message="And the learning rate?", student_id="s1")
+
+    async def scenario():
+        await store.put("s1", session)
+        return await asyncio.gather(
+            chat_api._prepare_turn(rag_service, payload),
+            chat_api._prepare_turn(rag_service, payload),
+        )
+
+    first, second = asyncio.run(scenario())
+
+    # Exactly one request continues the chat; the other starts fresh
+    assert sorted([first[1] is session, second[1] is session]) == [False, True]
+    # One embedding per request, also handed on for _remember_turn
+    assert rag_service.embed_calls == 2
+    assert first[3] is not None and second[3] is not None
+
+
+def test_successful_follow_up_puts_the_session_back(monkeypatch):
+    store = SessionStore()
+    monkeypatch.setattr(chat_api, "_sessions", store)
+    session = _session(_unit(1.0, 0.0, 0.0))
+    payload = chat_api.ChatRequest(message="And the learning rate?", student_id="s1")
+
+    async def scenario():
+        await chat_api._remember_turn(payload, session, [], "prompt", "answer", session.query_embedding)
+        return await store.get("s1")
+
+    assert asyncio.run(scenario()) is session
@@ -0,0 +1,90 @@
+"""
+SupabaseClient.insert_embeddings_bulk: one INSERT per batch, with a row-by-row
+retry so a rejected row loses only itself.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sys
+
+import numpy as np
+
+# Ensure project root is on sys.path so src.* imports
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from src.database.supabase_client import SupabaseClient  # noqa: E402
+
+
+class _FakeTable:
+    def __init__(self, client):
+        self._client = client
+        self._body = None
+
+    def insert(self, body):
+        self._body = body
+        return self
+
+    def execute(self):
+        rows = self._body if isinstance(self._body, list) else [self._body]
+        self._client.requests.append(len(rows))
+        if any(row["content"] == "bad" for row in rows):
+            raise RuntimeError("invalid input syntax")
+        self._client.rows.extend(row["content"] for row in rows)
+
+
+class _FakePostgrest:
+    def __init__(self):
+        self.requests = []
+        self.rows = []
+
+    def table(self, name):
+        assert name == "course_content"
+        return _FakeTable(self)
+
+
+def _client():
+    client = SupabaseClient.__new__(SupabaseClient)
+    client.client = _FakePostgrest()
+    return client
+
+
+def _records(*contents):
+    return [
+        {
+            "content": content,
+            "embedding": np.zeros(3, dtype=np.float32),
+            "metadata": {"source_file": "lesson.pdf"},
+        }
+        for content in contents
+    ]
+
+
+def test_each_batch_is_one_insert():
+    client = _client()
+
+    inserted = client.insert_embeddings_bulk(_records("a", "b", "c", "d", "e"), batch_size=2)
+
+    assert inserted == 5
+    assert client.client.requests == [2, 2, 1]
+    assert client.client.rows == ["a", "b", "c", "d", "e"]
+
+
+def test_rejected_batch_is_retried_row_by_row():
+    client = _client()
+
+    inserted = client.insert_embeddings_bulk(_records("a", "b", "bad", "c", "d"), batch_size=3)
+
+    assert inserted == 4
+    # The failing batch of 3 is retried as 3 single-row inserts; the next batch is unaffected
+    assert client.client.requests == [3, 1, 1, 1, 2]
+    assert client.client.rows == ["a", "b", "c", "d"]
+
+
+def test_no_records_makes_no_requests():
+    client = _client()
+
+    assert client.insert_embeddings_bulk([], batch_size=2) == 0
+    assert client.client.requests == []
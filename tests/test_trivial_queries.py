@@ -0,0 +1,88 @@
+"""
+Greetings and acknowledgements are answered without retrieval, Gemini or session changes.
+
+Run with: python -m pytest tests
+"""
+
+import os
+import sys
+
+import pytest
+from fastapi.testclient import TestClient
+
+# Ensure project root is on sys.path so chat_api and src.* import
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+import chat_api  # noqa: E402
+from src.rag.rag_service import RAGService, is_trivial_query  # noqa: E402
+from src.rag.session_store import ChatSession, SessionStore  # noqa: E402
+
+
+@pytest.mark.parametrize("message", ["hi", "Hello!", "thanks.", "  OK ", "no?"])
+def test_trivial_messages(message):
+    assert is_trivial_query(message)
+
+
+@pytest.mark.parametrize("message", ["hi there", "thank you", "gradient", "yes please explain"])
+def test_non_trivial_messages(message):
+    assert not is_trivial_query(message)
+
+
+def test_retrieve_context_skips_embedding_for_trivial_query():
+    class _NoEmbeddings:
+        def generate_embedding(self, *args, **kwargs):
+            raise AssertionError("trivial queries must not be embedded")
+
+    service = RAGService.__new__(RAGService)
+    service.embedding_service = _NoEmbeddings()
+
+    assert service.retrieve_context("thanks!") == []
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fail(*args, **kwargs):
+        raise AssertionError("trivial messages must skip retrieval and generation")
+
+    monkeypatch.setattr(chat_api, "_prepare_turn", fail)
+    monkeypatch.setattr(chat_api, "_generate", fail)
+    monkeypatch.setattr(chat_api, "_remember_turn", fail)
+    chat_api.app.dependency_overrides[chat_api.get_rag_service] = lambda: None
+    yield TestClient(chat_api.app)
+    chat_api.app.dependency_overrides.clear()
+
+
+def test_greeting_gets_canned_reply(client):
+    response = client.post("/api/chat", json={"message": "Hi!"})
+
+    assert response.status_code == 200
+    assert response.json()["answer"] == chat_api._GREETING_REPLY
+    assert response.json()["sources"] == []
+
+
+def test_acknowledgement_keeps_the_live_session(client, monkeypatch):
+    store = SessionStore()
+    monkeypatch.setattr(chat_api, "_sessions", store)
+    session = ChatSession([{"content": "retrieved"}], (), "chat", None)
+    store._sessions["s1"] = session
+
+    response = client.post("/api/chat", json={"message": "thanks", "student_id": "s1"})
+
+    assert response.json()["answer"] == chat_api._ACKNOWLEDGEMENT_REPLY
+    assert store._sessions["s1"] is session
+
+
+def test_stream_sends_canned_reply(client):
+    with client.stream("POST", "/api/chat/stream", json={"message": "hello"}) as response:
+        body = "".join(response.iter_text())
+
+    assert chat_api._GREETING_REPLY in body
+    assert '"type":"done"' in body
+
+
+def test_trivial_reply_can_be_disabled(monkeypatch):
+    monkeypatch.setattr(chat_api.Config, "SKIP_TRIVIAL_QUERIES", False)
+
+    assert chat_api._trivial_reply("hi") is None